@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+
+import hrd
+
+# Throughput of the astar open lists (hrd.open_lists) on large frontiers. The workload mimics
+# A* on HRD: every pop is followed by pushes with f equal to, or 2 above, the popped f.
+
+class Item:
+    # Stand-in for a state: open lists only need the id used to break ties
+    __slots__ = ('id',)
+
+    def __init__(self, id):
+        self.id = id
+
+def run(open_list, frontier_size, operations, seed):
+    random.seed(seed)
+    queue = hrd.open_lists[open_list]()
+    items = [Item(i) for i in range(frontier_size + operations // 2)]
+    for i in range(frontier_size):
+        queue.push(random.randint(20, 40), items[i])
+
+    start = time.perf_counter()
+    next_item = frontier_size
+    f = 20
+    # Each round is three pops and three pushes
+    for i in range(operations // 6):
+        queue.pop()
+        # Roughly one in three successors keeps f (h dropped by one), the rest get f + 2
+        for j in range(3):
+            queue.push(f if random.random() < 0.3 else f + 2, items[next_item])
+            next_item += 1
+        queue.pop()
+        queue.pop()
+        if i % 1000 == 0:
+            f += 1
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs='+',
+        default=[10000, 100000, 1000000],
+        help="Frontier sizes to measure."
+    )
+    parser.add_argument(
+        "--operations",
+        type=int,
+        default=300000,
+        help="Push/pop operations timed per frontier size."
+    )
+    args = parser.parse_args()
+
+    print('{:>10} {:>8} {:>14}'.format('frontier', 'queue', 'ops/s'))
+    for size in args.sizes:
+        for open_list in sorted(hrd.open_lists):
+            elapsed = run(open_list, size, args.operations, seed=size)
+            print('{:>10} {:>8} {:>14,.0f}'.format(size, open_list, args.operations / elapsed))
@@ -1,8 +1,23 @@
 from copy import deepcopy
 from heapq import heappush, heappop
+from array import array
+from bisect import bisect_left
+from itertools import combinations
+from multiprocessing import Process, Queue
+from queue import Empty
+import json
+import mmap
+import os
+import sqlite3
+import struct
 import time
 import argparse
 import sys
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, where --stats leaves out the peak memory
+    resource = None
 
 #====================================================================================
 
@@ -56,14 +71,18 @@ class Board:
     Board class for setting up the playing board.
     """
 
-    def __init__(self, pieces):
+    def __init__(self, pieces, width=4, height=5):
         """
         :param pieces: The list of Pieces
         :type pieces: List[Piece]
+        :param width: The number of columns of the board.
+        :type width: int
+        :param height: The number of rows of the board.
+        :type height: int
         """
 
-        self.width = 4
-        self.height = 5
+        self.width = width
+        self.height = height
 
         self.pieces = pieces
 
@@ -118,10 +137,10 @@ class Board:
             print()
     
     def find_empty(self):
-        # find the two empty slots on the board
+        # find the empty slots on the board
         empty = []
-        for i in range(5):
-            for j in range(4):
+        for i in range(self.height):
+            for j in range(self.width):
                 if self.grid[i][j] == '.':
                     point = (j,i)
                     empty += [point]
@@ -151,22 +170,27 @@ class State:
         self.f = f
         self.depth = depth
         self.parent = parent
-        self.id = hash(board)  # The id for breaking ties.
+        self.key = encode_grid(board.grid)  # Compact hashable key of the board, computed once.
+        self.id = self.key  # The id for breaking ties.
+        self.index = -1  # Entry of the state in a PathArena, when the search keeps one.
 
     def goal_state(self):
         # Check if the current state is a goal state
-        # Goal state if the King piece coordinates are: coord_x = 1, coord_y = 3 (location of top left piece)
-        if self.board.grid[3][1] == '1' and self.board.grid[3][2] == '1' and self.board.grid[4][1] == '1' \
-        and self.board.grid[4][2] == '1':
+        # Goal state if the King piece coordinates are: coord_x = goal_x, coord_y = goal_y (location of top left
+        # piece), i.e. (1,3) on the standard 4x5 board
+        grid = self.board.grid
+        if grid[goal_y][goal_x] == '1' and grid[goal_y][goal_x + 1] == '1' and grid[goal_y + 1][goal_x] == '1' \
+        and grid[goal_y + 1][goal_x + 1] == '1':
             return True
         else:
             return False
 
-    def heuristic(self, state):
+    def heuristic(self, state, weight=1):
         # Compute heuristic function from state (n) to goal state
         # Initial state to state n costs g (depth of state) 
-        # Goal: king top left part should be located at (1,3)
-        goal = (1,3)
+        # Goal: king top left part should be located at (goal_x, goal_y), (1,3) on the standard board
+        # weight scales h for weighted A* (f = g + weight * h)
+        goal = (goal_x, goal_y)
         if state.goal_state():
             # h = 0
             state.f = state.depth
@@ -174,9 +198,9 @@ class State:
             for piece in state.board.pieces:
                 if piece.is_goal:
                     h = abs(piece.coord_x - goal[0]) + abs(piece.coord_y - goal[1])
-                    state.f = h + state.depth
+                    state.f = weight * h + state.depth
 
-    def generate_successors(self):
+    def generate_successors(self, weight=1):
         # Based on state, return a list of the possible successor states
 
         """
@@ -189,82 +213,35 @@ class State:
         """
 
         spaces = self.board.find_empty()
-        empty1, empty2 = spaces[0], spaces[1]
-        
-        # Get coords of pieces around empty spots if not at edges
-        if empty1[0] != 0:
-            left1 = self.piece_left(empty1)
-            # print(left1)
-        else:
-            left1 = None
-            # print(left1)
-        if empty2[0] != 0:
-            left2 = self.piece_left(empty2)
-            # print(left2)
-        else:
-            left2 = None
-            # print(left2)           
-        if empty1[0] != 3:
-            right1 = self.piece_right(empty1)
-            # print(right1)
-        else:
-            right1 = None
-            # print(right1)
-        if empty2[0] != 3:
-            right2 = self.piece_right(empty2)
-            # print(right2)
-        else:
-            right2 = None
-            # print(right2)
-        if empty1[1] != 0:
-            above1 = self.piece_above(empty1)
-            # print(above1)
-        else:
-            above1 = None
-            # print(above1)
-        if empty2[1] != 0:
-            above2 = self.piece_above(empty2)
-            # print(above2)
-        else:
-            above2 = None
-            # print(above2)
-        if empty1[1] != 4:
-            below1 = self.piece_below(empty1)
-            # print(below1)
-        else:
-            below1 = None
-            # print(below1)
-        if empty2[1] != 4:
-            below2 = self.piece_below(empty2)
-            # print(below2)
-        else:
-            below2 = None
-            # print(below2)
-        
-        # Using surrounding piece coordinates, classify the pieces and generate states for each empty slot
-        successor_states1 = self.piece_classification(left1, right1, above1, below1, empty1)
-        successor_states2 = self.piece_classification(left2, right2, above2, below2, empty2)
+        last_x, last_y = self.board.width - 1, self.board.height - 1
+        successors_dup = []
 
-        # Combine state lists to 1 successor state list
-        successors_dup = successor_states1 + successor_states2
-        successors_boards = []
+        for empty1 in spaces:
+            # Get coords of pieces around empty spot if not at edges
+            left1 = self.piece_left(empty1) if empty1[0] != 0 else None
+            right1 = self.piece_right(empty1) if empty1[0] != last_x else None
+            above1 = self.piece_above(empty1) if empty1[1] != 0 else None
+            below1 = self.piece_below(empty1) if empty1[1] != last_y else None
+
+            # Using surrounding piece coordinates, classify the pieces and generate states for the empty slot
+            successors_dup += self.piece_classification(left1, right1, above1, below1, empty1)
+
+        successors_keys = set()
         successors = []
         
-        # Get rid of duplicate states from the two empty spots. Then calculate heuristic for each remaining state
-        for i in range (len(successors_dup)):
-            if successors_dup[i].board.grid not in successors_boards:
-                successors_boards += [successors_dup[i].board.grid]
-
-        for i in range (len(successors_dup)):
-            for j in range (len(successors_boards)):
-                if successors_dup[i].board.grid == successors_boards[j]:
-                    successors.append(successors_dup[i])
-                    successors_boards.remove(successors_boards[j])
-                    self.heuristic(successors_dup[i])
-                    break
+        # Get rid of duplicate states from different empty spots. Then calculate heuristic for each remaining state
+        for successor in successors_dup:
+            if successor.key not in successors_keys:
+                successors_keys.add(successor.key)
+                successors.append(successor)
+                self.heuristic(successor, weight)
 
         return successors
 
+    def iter_successors(self):
+        # Successors one at a time, last generated first, i.e. in the order a LIFO frontier pops them
+        return reversed(self.generate_successors())
+
     def piece_left(self, empty_spot):
         # Determine what piece is to the left of the empty spot
         piece = self.board.grid[empty_spot[1]][empty_spot[0]-1]
@@ -447,22 +424,22 @@ class State:
                                 # Can move king 2x2 if second empty spot is below or above first empty
                                 # Else: Can't move king piece as we only have one empty space available and need 2 adjacent
                                 piece_cp.move('right')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                     else:
                         # top left 1 begins one row above
                         if above1 == empty1:
                             # Can move king 2x2 if second empty spot is below or above first empty
                             piece_cp.move('right')
-                            states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                            states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 elif piece.is_single:
                     # Single piece (1 space)
                     piece_cp.move('right')
-                    states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                    states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 else:
                     # 1x2 piece (2 spaces)
                     if piece.orientation == 'h':
                         piece_cp.move('right')
-                        states.append(State(Board(cp_board.pieces),0,self.depth+1,self))                
+                        states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))                
                     elif piece.orientation == 'v':
                         if left1 == (empty1[0]-1, empty1[1]):
                             # '^' begins to left of empty
@@ -470,13 +447,13 @@ class State:
                                 # Can move vertical 1x2 if second empty spot is below or above first empty
                                 # Else: Can't move vertical piece as we only have one empty space available and need 2 adjacent
                                 piece_cp.move('right')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                         else:
                             # '^' begins one row above
                             if above1 == empty1:
                                 # Can move vertical 1x2 if second empty spot is below or above first empty
                                 piece_cp.move('right')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                                             
             ### RIGHT PIECE
             elif right1 is not None and (piece.coord_x, piece.coord_y) == right1:
@@ -495,22 +472,22 @@ class State:
                             # Can move king 2x2 if second empty spot is below or above first empty
                             # Else: Can't move king piece as we only have one empty space available and need 2 adjacent
                             piece_cp.move('left')
-                            states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                            states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                     else:
                         # top left 1 begins one row above
                         if above1 == empty1:
                             # Can move king 2x2 if second empty spot is below or above first empty
                             piece_cp.move('left')
-                            states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                            states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 elif piece.is_single:
                     # Single piece (1 space)
                     piece_cp.move('left')
-                    states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                    states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 else:
                     # 1x2 piece (2 spaces)
                     if piece.orientation == 'h':
                         piece_cp.move('left')
-                        states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                        states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                     elif piece.orientation == 'v':
                         if right1 == (empty1[0]+1, empty1[1]):
                             # '^' begins to right of empty
@@ -518,13 +495,13 @@ class State:
                                 # Can move vertical 1x2 if second empty spot is below or above first empty
                                 # Else: Can't move vertical piece as we only have one empty space available and need 2 adjacent
                                 piece_cp.move('left')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                         else:
                             # '^' begins one row above
                             if above1 == empty1:
                                 # Can move vertical 1x2 if second empty spot is below or above first empty
                                 piece_cp.move('left')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
         
             ### ABOVE PIECE
             elif above1 is not None and (piece.coord_x, piece.coord_y) == above1:
@@ -543,15 +520,15 @@ class State:
                             if right1 == empty1:
                                 # Else: Can't move king piece as we only have one empty space available and need 2 adjacent
                                 piece_cp.move('down')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                     else: 
                         if left1 == empty1:
                             piece_cp.move('down')
-                            states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                            states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 elif piece.is_single:
                     # Single piece (1 space)
                     piece_cp.move('down')
-                    states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                    states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 else:
                     # 1x2 piece (2 spaces)
                     if piece.orientation == 'h':
@@ -559,15 +536,15 @@ class State:
                             # '<' begins above of empty
                             if right1 == empty1:
                                 piece_cp.move('down')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                         else:
                             # '<' begins one row above and one to the left
                             if left1 == empty1:
                                 piece_cp.move('down')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))                                              
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))                                              
                     elif piece.orientation == 'v':
                         piece_cp.move('down')
-                        states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                        states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
 
             ### BELOW PIECE
             elif below1 is not None and (piece.coord_x, piece.coord_y) == below1:
@@ -586,15 +563,15 @@ class State:
                             if right1 == empty1:
                                 # Else: Can't move king piece as we only have one empty space available and need 2 adjacent
                                 piece_cp.move('up')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                     else: 
                         if left1 == empty1:
                             piece_cp.move('up')
-                            states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                            states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 elif piece.is_single:
                     # Single piece (1 space)
                     piece_cp.move('up')
-                    states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                    states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                 else:
                     # 1x2 piece (2 spaces)
                     if piece.orientation == 'h':
@@ -602,15 +579,15 @@ class State:
                             # '<' begins below empty
                             if right1 == empty1:
                                 piece_cp.move('up')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
                         else:
                             # '<' begins one row below and one to the left
                             if left1 == empty1:
                                 piece_cp.move('up')
-                                states.append(State(Board(cp_board.pieces),0,self.depth+1,self))                                             
+                                states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))                                             
                     elif piece.orientation == 'v':
                         piece_cp.move('up')
-                        states.append(State(Board(cp_board.pieces),0,self.depth+1,self))
+                        states.append(State(Board(cp_board.pieces, cp_board.width, cp_board.height),0,self.depth+1,self))
         
         return states        
 
@@ -627,9 +604,493 @@ class State:
         print(count)
         return path
 
+#====================================================================================
+# Packed board representation
+#
+# Every cell of the board is stored in 3 bits of a single integer: cell (x, y) lives in
+# bits 3*(y*width + x) .. 3*(y*width + x) + 2. A whole 4x5 board is therefore one 60-bit
+# int which is hashable, compared in O(1) and never needs to be deep copied.
+#
+# width and height start at the standard 4x5 board. read_from_file calls set_board_size with
+# the size of the puzzle, which rebuilds every table below for that size.
+
+width = 4
+height = 5
+
+# Cell codes, indexed into cell_symbols to get back the character used in a grid
+cell_symbols = '.12<>^v'
+code_empty, code_goal, code_single, code_left, code_right, code_top, code_bottom = range(7)
+
+# Cells covered by each piece as (dx, dy, cell code) offsets from its top left corner
+piece_shapes = {
+    code_goal: ((0, 0, code_goal), (1, 0, code_goal), (0, 1, code_goal), (1, 1, code_goal)),
+    code_single: ((0, 0, code_single),),
+    code_left: ((0, 0, code_left), (1, 0, code_right)),
+    code_top: ((0, 0, code_top), (0, 1, code_bottom)),
+}
+
+directions = {'left': (-1, 0), 'right': (1, 0), 'up': (0, -1), 'down': (0, 1)}
+
+def cell_shift(x, y):
+    # Bit offset of cell (x, y) in a packed board
+    return 3 * (y * width + x)
+
+def cell_at(code, x, y):
+    # Code of the piece part sitting at (x, y) of a packed board
+    return (code >> cell_shift(x, y)) & 7
+
+def piece_bits(piece, x, y):
+    # Packed value of a piece whose top left corner is at (x, y), on an otherwise empty board
+    bits = 0
+    for dx, dy, ch in piece_shapes[piece]:
+        bits |= ch << cell_shift(x + dx, y + dy)
+    return bits
+
+def piece_mask(piece, x, y):
+    # Mask selecting every cell covered by a piece whose top left corner is at (x, y)
+    mask = 0
+    for dx, dy, ch in piece_shapes[piece]:
+        mask |= 7 << cell_shift(x + dx, y + dy)
+    return mask
+
+# Goal: top left corner of the king at the middle of the bottom two rows, (1, 3) on the 4x5 board
+goal_x, goal_y = (width - 2) // 2, height - 2
+goal_mask = piece_mask(code_goal, goal_x, goal_y)
+goal_bits = piece_bits(code_goal, goal_x, goal_y)
+
+def encode_grid(grid):
+    # Pack a grid (list of rows of symbols) into a single int
+    code = 0
+    for y, line in enumerate(grid):
+        for x, ch in enumerate(line):
+            code |= cell_symbols.index(ch) << cell_shift(x, y)
+    return code
+
+def decode_grid(code):
+    # Rebuild the list of rows of symbols stored in a packed board
+    grid = []
+    for y in range(height):
+        line = []
+        for x in range(width):
+            line.append(cell_symbols[cell_at(code, x, y)])
+        grid.append(line)
+    return grid
+
+def mirror_row(row):
+    # Reflect one packed row left to right. The halves of a horizontal piece swap symbols.
+    mirrored = 0
+    for x in range(width):
+        ch = (row >> (3 * x)) & 7
+        if ch == code_left:
+            ch = code_right
+        elif ch == code_right:
+            ch = code_left
+        mirrored |= ch << (3 * (width - 1 - x))
+    return mirrored
+
+# Reflection of every packed row seen so far, so a board is mirrored with one lookup per row
+row_bits = 3 * width
+mirrored_rows = {}
+
+def mirror_code(code):
+    # Reflect a packed board left to right
+    mirrored = 0
+    row_mask = (1 << row_bits) - 1
+    for y in range(height):
+        shift = y * row_bits
+        row = (code >> shift) & row_mask
+        reflected = mirrored_rows.get(row)
+        if reflected is None:
+            reflected = mirrored_rows[row] = mirror_row(row)
+        mirrored |= reflected << shift
+    return mirrored
+
+def canonical_key(key):
+    # A board and its mirror image share the same canonical key. Only on boards of even width
+    # is the goal its own mirror image, so on the others every board is its own key.
+    if width % 2:
+        return key
+    return min(key, mirror_code(key))
+
+def find_goal_piece(code):
+    # Top left corner of the king, which is the first king cell in row major order. The king's
+    # cells are the only ones holding code_goal (1), i.e. with just their low bit set.
+    kings = code & ~(code >> 1) & ~(code >> 2) & cell_low_bits
+    if not kings:
+        return None
+    index = ((kings & -kings).bit_length() - 1) // 3
+    return index % width, index // width
+
+def manhattan(code):
+    # Manhattan distance of the top left corner of the king to (goal_x, goal_y)
+    x, y = find_goal_piece(code)
+    return abs(x - goal_x) + abs(y - goal_y)
+
+def piece_fits(piece, x, y):
+    # True if a piece with its top left corner at (x, y) lies completely on the board
+    return all(0 <= x + dx < width and 0 <= y + dy < height for dx, dy, ch in piece_shapes[piece])
+
+def build_move_deltas():
+    """
+    Precompute, for every piece type, top left cell index and direction that keep the piece on
+    the board, the amount to add to a packed board to slide the piece. Vacated cells go back to
+    code_empty (0) and the cells entered were empty, so a move is a single integer addition.
+    """
+    deltas = {}
+    for piece in piece_shapes:
+        for y in range(height):
+            for x in range(width):
+                if not piece_fits(piece, x, y):
+                    continue
+                for dir, (dx, dy) in directions.items():
+                    if piece_fits(piece, x + dx, y + dy):
+                        deltas[piece, y * width + x, dir] = piece_bits(piece, x + dx, y + dy) - piece_bits(piece, x, y)
+    return deltas
+
+move_deltas = build_move_deltas()
+
+# Lowest bit of every cell. A cell is empty iff none of its 3 bits are set, so
+# ~(code | code >> 1 | code >> 2) & cell_low_bits has exactly the low bit of each empty cell set.
+cell_low_bits = sum(1 << cell_shift(x, y) for y in range(height) for x in range(width))
+
+def empty_bits(code):
+    # Bitmask (one bit per cell, at the cell's low bit) of the empty cells of a packed board
+    return ~(code | code >> 1 | code >> 2) & cell_low_bits
+
+def build_move_shapes():
+    """
+    Describe every move of move_deltas, in the same order, for build_move_entries.
+
+    :return: The (covered, entered, entry) of each move, where covered and entered are the cells
+        the piece covers and the cells it moves into, as cell low bits (see cell_low_bits), and
+        entry is its move table entry. Then, for every cell index, the positions in that list
+        of the moves entering the cell.
+    :rtype: Tuple[List[Tuple[int, int, tuple]], List[List[int]]]
+    """
+    shapes = []
+    entering = [[] for cell in range(width * height)]
+    for (piece, index, dir), delta in move_deltas.items():
+        x, y = index % width, index // width
+        dx, dy = directions[dir]
+        cells = set((x + ox, y + oy) for ox, oy, ch in piece_shapes[piece])
+        entered = set((cx + dx, cy + dy) for cx, cy in cells) - cells
+        for cx, cy in entered:
+            entering[cy * width + cx].append(len(shapes))
+        shapes.append((sum(1 << cell_shift(cx, cy) for cx, cy in cells), \
+            sum(1 << cell_shift(cx, cy) for cx, cy in entered), \
+            (piece_mask(piece, x, y), piece_bits(piece, x, y), delta)))
+    return shapes, entering
+
+move_shapes, moves_entering = build_move_shapes()
+
+# Move table: empty_bits of a board -> every move that could be legal with those cells empty
+move_table = {}
+
+def build_move_entries(empty):
+    """
+    Build the move table entry for one set of empty cells.
+
+    A move is listed when every cell the piece enters is empty and none of the cells it covers
+    is. Whether it is legal on a given board then only depends on the piece actually being
+    there, i.e. code & mask == bits. Each (piece, cell, direction) is listed once, so the moves
+    of a board never need de-duplicating. Only the moves entering one of the empty cells are
+    looked at, so larger boards do not make this slower.
+
+    :param empty: The empty cells, as returned by empty_bits.
+    :type empty: int
+    :return: (mask, bits, delta) tuples, in the order of move_deltas. mask/bits test for the
+        piece and delta is added to the board to make the move.
+    :rtype: List[Tuple[int, int, int]]
+    """
+    candidates = set()
+    cells = empty
+    while cells:
+        low = cells & -cells
+        candidates.update(moves_entering[(low.bit_length() - 1) // 3])
+        cells ^= low
+    entries = []
+    for position in sorted(candidates):
+        covered, entered, entry = move_shapes[position]
+        if entered & ~empty == 0 and covered & empty == 0:
+            entries.append(entry)
+    return entries
+
+def move_entries(code):
+    # Move table entry for the empty cells of a packed board, built the first time they are seen
+    empty = empty_bits(code)
+    entries = move_table.get(empty)
+    if entries is None:
+        entries = move_table[empty] = build_move_entries(empty)
+    return entries
+
+class PackedState:
+    """
+    State class for searching on packed boards. Same role as State, but the board is kept
+    as a packed int so generating a successor never copies Pieces or rebuilds a grid. The
+    grid is only rebuilt by get_path once a solution has been found.
+    """
+
+    __slots__ = ('code', 'f', 'depth', 'parent', 'key', 'id', 'index')
+
+    def __init__(self, code, f, depth, parent=None):
+        """
+        :param code: The packed board of the state.
+        :type code: int
+        :param f: The f value of current state.
+        :type f: int
+        :param depth: The depth of current state in the search tree.
+        :type depth: int
+        :param parent: The parent of current state.
+        :type parent: Optional[PackedState]
+        """
+        self.code = code
+        self.f = f
+        self.depth = depth
+        self.parent = parent
+        self.key = code  # The packed board already is a compact hashable key.
+        self.id = code  # The id for breaking ties.
+        self.index = -1  # Entry of the state in a PathArena, when the search keeps one.
+
+    def goal_state(self):
+        # Goal state if the top left corner of the king is at (goal_x, goal_y)
+        return self.code & goal_mask == goal_bits
+
+    def heuristic(self, state, h=manhattan, weight=1):
+        # f of state using heuristic h (a function of the packed board, Manhattan distance by default)
+        # weight scales h for weighted A* (f = g + weight * h)
+        state.f = weight * h(state.code) + state.depth
+
+    def generate_successors(self, h=manhattan, weight=1):
+        # Look up the moves for the empty cells and apply the ones whose piece is on the board
+        code = self.code
+        successors = []
+        for mask, bits, delta in move_entries(code):
+            if code & mask == bits:
+                successor = PackedState(code + delta, 0, self.depth + 1, self)
+                self.heuristic(successor, h, weight)
+                successors.append(successor)
+        return successors
+
+    def iter_successors(self, h=manhattan):
+        # Successors one at a time, last generated first, i.e. in the order a LIFO frontier pops
+        # them. Nothing is built until the next successor is asked for.
+        code = self.code
+        for mask, bits, delta in reversed(move_entries(code)):
+            if code & mask == bits:
+                successor = PackedState(code + delta, 0, self.depth + 1, self)
+                self.heuristic(successor, h)
+                yield successor
+
+    def get_path(self):
+        # Backtrack using the parent values and rebuild the grid of every board on the path
+        path = []
+        count = 0
+        while self.parent != None:
+            path += [decode_grid(self.code)]
+            self = self.parent
+            count += 1
+        path += [decode_grid(self.code)]
+        print(count)
+        return path
+
+def pack_state(board):
+    # Initial PackedState for a board loaded by read_from_file
+    return PackedState(encode_grid(board.grid), 0, 0, None)
+
+class PathArena:
+    """
+    Parent pointers of the states reached by a search, kept in two parallel arrays instead of
+    references between states: keys[i] is the packed board of entry i and parents[i] the entry
+    it was reached from (-1 for the initial board). A state only remembers its own entry, so it
+    (and its Board) can be freed as soon as it has been expanded.
+    """
+
+    def __init__(self):
+        # Packed boards of more than 21 cells do not fit in 64 bits, so they stay Python ints
+        self.keys = array('Q') if 3 * width * height <= 64 else []
+        self.parents = array('q')
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, parent=-1):
+        # Store a board reached from entry parent and return its own entry
+        self.keys.append(key)
+        self.parents.append(parent)
+        return len(self.keys) - 1
+
+    def path(self, index):
+        # Chain of PackedStates from the initial board to entry index, whose get_path rebuilds
+        # the grids. Only the boards on this one path are turned back into states.
+        indices = []
+        while index != -1:
+            indices.append(index)
+            index = self.parents[index]
+        state = None
+        for depth, index in enumerate(reversed(indices)):
+            state = PackedState(self.keys[index], 0, depth, state)
+        return state
+
+#====================================================================================
+# Heuristics
+#
+# Admissible heuristics for packed boards, selected with --heuristic. Each one is a function
+# of the packed board and everything it needs is precomputed once and cached.
+
+def count_blockers(cells):
+    # Number of distinct non-king pieces covering the four goal cells (top left, top right,
+    # bottom left, bottom right)
+    top_left, top_right, bottom_left, bottom_right = cells
+    count = sum(1 for ch in cells if ch != code_empty and ch != code_goal)
+    # Both halves of a 1x2 piece inside the goal area are only one piece
+    if top_left == code_left and top_right == code_right:
+        count -= 1
+    if bottom_left == code_left and bottom_right == code_right:
+        count -= 1
+    if top_left == code_top and bottom_left == code_bottom:
+        count -= 1
+    if top_right == code_top and bottom_right == code_bottom:
+        count -= 1
+    return count
+
+# Number of blockers for every content of the goal area. The two goal cells of a row are 6
+# consecutive bits of a packed board, so the area is looked up by those two 6 bit groups.
+goal_top_shift = cell_shift(goal_x, goal_y)
+goal_bottom_shift = cell_shift(goal_x, goal_y + 1)
+goal_blockers = [count_blockers((top & 7, top >> 3, bottom & 7, bottom >> 3)) \
+    for bottom in range(64) for top in range(64)]
+
+def blocking(code):
+    """
+    Manhattan distance plus the number of other pieces in the goal area. Each of those pieces
+    has to move at least once to make room for the king, and those moves are not king moves,
+    so the sum never overestimates. A single move changes either term by at most one, so it is
+    also consistent.
+    """
+    area = (code >> goal_top_shift) & 63 | ((code >> goal_bottom_shift) & 63) << 6
+    return manhattan(code) + goal_blockers[area]
+
+# Pattern database over (top left cell of the king, empty_bits) for every number of empty
+# cells seen so far
+pdb_distances = {}
+pdb_built = set()
+
+def abstract_moves(king, empty):
+    """
+    Moves of the king + empty cells abstraction, where every other cell is just "covered".
+    Any real move maps to one of these, so distances in the abstraction are admissible:
+    the king slides into empty cells, one empty cell moves 1 or 2 cells in a line over covered
+    cells (a single, or a 1x2 piece along its length), or two side by side empty cells both
+    move one cell across (a 1x2 piece moving sideways).
+
+    :param king: Cell index of the top left corner of the king.
+    :type king: int
+    :param empty: Cell indices of the empty cells.
+    :type empty: frozenset
+    :rtype: List[Tuple[int, frozenset]]
+    """
+    kx, ky = king % width, king // width
+    king_cells = set((ky + dy) * width + kx + dx for dx, dy, ch in piece_shapes[code_goal])
+
+    def covered(x, y):
+        # On the board and covered by a piece other than the king
+        index = y * width + x
+        return 0 <= x < width and 0 <= y < height and index not in king_cells and index not in empty
+
+    moves = []
+    for dx, dy in directions.values():
+        if piece_fits(code_goal, kx + dx, ky + dy):
+            moved = set((ky + dy + oy) * width + kx + dx + ox for ox, oy, ch in piece_shapes[code_goal])
+            if moved - king_cells <= empty:
+                moves.append(((ky + dy) * width + kx + dx, frozenset((empty - moved) | (king_cells - moved))))
+        for cell in empty:
+            x, y = cell % width, cell // width
+            for steps in (1, 2):
+                if all(covered(x + dx * step, y + dy * step) for step in range(1, steps + 1)):
+                    target = (y + dy * steps) * width + x + dx * steps
+                    moves.append((king, empty - {cell} | {target}))
+            # A second empty cell beside this one, across the direction of the move
+            other = (y + abs(dx)) * width + x + abs(dy)
+            if other in empty and (x + abs(dy) < width) and covered(x + dx, y + dy) \
+                and covered(x + abs(dy) + dx, y + abs(dx) + dy):
+                moves.append((king, empty - {cell, other} | {cell + dy * width + dx, other + dy * width + dx}))
+    return moves
+
+def build_pattern_database(empties):
+    # BFS over the abstraction from every goal (king at (goal_x, goal_y), empties anywhere else)
+    goal = goal_y * width + goal_x
+    free = [index for index in range(width * height) \
+        if index not in set((goal_y + dy) * width + goal_x + dx for dx, dy, ch in piece_shapes[code_goal])]
+    seen = set()
+    layer = []
+    for empty in combinations(free, empties):
+        seen.add((goal, frozenset(empty)))
+        layer.append((goal, frozenset(empty)))
+    depth = 0
+    while layer:
+        next_layer = []
+        for king, empty in layer:
+            pdb_distances[king, sum(1 << (3 * index) for index in empty)] = depth
+            for move in abstract_moves(king, empty):
+                if move not in seen:
+                    seen.add(move)
+                    next_layer.append(move)
+        layer = next_layer
+        depth += 1
+    pdb_built.add(empties)
+
+def pattern_database(code):
+    # Exact number of moves to the goal in the king + empty cells abstraction (abstract_moves)
+    x, y = find_goal_piece(code)
+    empty = empty_bits(code)
+    h = pdb_distances.get((y * width + x, empty))
+    if h is None:
+        empties = bin(empty).count('1')
+        if empties in pdb_built:
+            # The abstraction cannot reach the goal, so neither can the board
+            return float('inf')
+        build_pattern_database(empties)
+        return pattern_database(code)
+    return h
+
+heuristics = {'manhattan': manhattan, 'blocking': blocking, 'pdb': pattern_database}
+
+def set_board_size(board_width, board_height):
+    """
+    Switch the packed representation to boards of another size. Every table derived from the
+    size is rebuilt, and the move table, mirrored rows and pattern database built for the
+    previous size are emptied. Nothing changes if the size is the current one.
+
+    :param board_width: The number of columns.
+    :type board_width: int
+    :param board_height: The number of rows.
+    :type board_height: int
+    """
+    global width, height, goal_x, goal_y, goal_mask, goal_bits, row_bits, move_deltas, move_shapes, \
+        moves_entering, cell_low_bits, goal_top_shift, goal_bottom_shift
+    if (board_width, board_height) == (width, height):
+        return
+    if board_width < 2 or board_height < 2:
+        raise ValueError('a {}x{} board cannot hold the king'.format(board_width, board_height))
+    width, height = board_width, board_height
+    goal_x, goal_y = (width - 2) // 2, height - 2
+    goal_mask = piece_mask(code_goal, goal_x, goal_y)
+    goal_bits = piece_bits(code_goal, goal_x, goal_y)
+    row_bits = 3 * width
+    mirrored_rows.clear()
+    move_deltas = build_move_deltas()
+    move_shapes, moves_entering = build_move_shapes()
+    cell_low_bits = sum(1 << cell_shift(x, y) for y in range(height) for x in range(width))
+    move_table.clear()
+    goal_top_shift = cell_shift(goal_x, goal_y)
+    goal_bottom_shift = cell_shift(goal_x, goal_y + 1)
+    pdb_distances.clear()
+    pdb_built.clear()
+
 def read_from_file(filename):
     """
-    Load initial board from a given file.
+    Load initial board from a given file. The board is as wide as the longest line and as tall
+    as the last non-empty line, and set_board_size switches the packed representation to it.
 
     :param filename: The name of the given file.
     :type filename: str
@@ -642,10 +1103,14 @@ def read_from_file(filename):
     line_index = 0
     pieces = []
     g_found = False
+    board_width = board_height = 0
 
     for line in puzzle_file:
 
         # Reading file to find each piece and setting their initial positions
+        if line.strip():
+            board_width = max(board_width, len(line.rstrip('\n')))
+            board_height = line_index + 1
 
         for x, ch in enumerate(line):
 
@@ -664,7 +1129,8 @@ def read_from_file(filename):
     puzzle_file.close()
 
     # Initialize board with pieces and state of current board to be updated when the board changes
-    board = Board(pieces)
+    set_board_size(board_width, board_height)
+    board = Board(pieces, board_width, board_height)
     state = State(board, 0, 0, None) 
     
     return board, state
@@ -686,49 +1152,1114 @@ def output_file(filename, soln):
     # Close file
     output.close()
 
-def dfs(state0):
-    # initialize frontier list and explored set
-    frontier = [state0]
-    explored = set()
+def search_stats(expanded, generated, duplicates, peak_frontier, peak_explored, successor_time, queue_time):
+    """
+    Counters reported by the searches for --stats.
+
+    :param expanded: States whose successors were generated.
+    :param generated: Successors generated.
+    :param duplicates: Generated or popped states skipped because their board was already
+        explored or queued at no greater depth.
+    :param peak_frontier: Largest size of the open list (for dfs, of the stack of generators).
+    :param peak_explored: Largest size of the explored set.
+    :param successor_time: Seconds spent generating successors.
+    :param queue_time: Seconds spent pushing to and popping from the open list.
+    :rtype: dict
+    """
+    return {'expanded': expanded, 'generated': generated, 'duplicates': duplicates, \
+        'peak_frontier': peak_frontier, 'peak_explored': peak_explored, \
+        'successor_time': round(successor_time, 6), 'queue_time': round(queue_time, 6)}
 
-    while frontier:
-        # while frontier is not empty
-        # remove based on LIFO
-        state = frontier.pop()
-        if str(state.board.grid) not in explored:
-            explored.add(str(state.board.grid))
+class HeapQueue:
+    """
+    Open list on a binary heap of (f, id, state) tuples: smallest f first, ties broken by id.
+    """
+
+    def __init__(self):
+        self.heap = []
+
+    def __len__(self):
+        return len(self.heap)
+
+    def push(self, f, state):
+        heappush(self.heap, (f, state.id, state))
+
+    def pop(self):
+        return heappop(self.heap)[2]
+
+    def __iter__(self):
+        # Every queued state, in no particular order
+        return (entry[2] for entry in self.heap)
+
+class BucketQueue:
+    """
+    Dial's open list for small non-negative integer f values: one list (bucket) per f value and
+    a pointer to the lowest bucket that may be non empty. A push appends to its bucket and a
+    pop takes the last state of the lowest non empty bucket, so both are O(1) amortized and
+    ties are broken LIFO, i.e. in favour of the states generated last (usually the deepest).
+    """
+
+    def __init__(self):
+        self.buckets = []
+        self.lowest = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, f, state):
+        while len(self.buckets) <= f:
+            self.buckets.append([])
+        self.buckets[f].append(state)
+        if f < self.lowest:
+            self.lowest = f
+        self.size += 1
+
+    def pop(self):
+        while not self.buckets[self.lowest]:
+            self.lowest += 1
+        self.size -= 1
+        return self.buckets[self.lowest].pop()
+
+    def __iter__(self):
+        # Every queued state, in no particular order
+        return (state for bucket in self.buckets[self.lowest:] for state in bucket)
+
+open_lists = {'heap': HeapQueue, 'bucket': BucketQueue}
+
+def dfs(state0, symmetry=False, stats=None):
+    # Depth first search on a stack of successor generators, one per board on the current path.
+    # The top generator is asked for its next successor; an unexplored one is checked and its own
+    # generator pushed, and an exhausted generator is popped. Successors are only built when
+    # they are reached, so each expansion costs the same however large the search gets.
+    # With symmetry, a board and its mirror image share one explored set entry. The goal is
+    # symmetric, so whichever of the two is expanded first reaches a goal just as well.
+    # If stats is a dict, the search counters are stored in it (see search_stats).
+    clock = time.perf_counter
+    expanded = generated = duplicates = 0
+    peak_frontier = 1
+    successor_time = queue_time = 0.0
+    stack = [iter([state0])]
+    explored = set()
+    result = None
+
+    while stack:
+        start = clock()
+        state = next(stack[-1], None)
+        successor_time += clock() - start
+        if state is None:
+            # Every successor of this board has been searched
+            start = clock()
+            stack.pop()
+            queue_time += clock() - start
+            continue
+        generated += 1
+        key = canonical_key(state.key) if symmetry else state.key
+        if key in explored:
+            duplicates += 1
+            continue
+        explored.add(key)
+        if state.goal_state():
+            # If state is goal state, get goal path and return it
+            result = state
+            break
+        expanded += 1
+        start = clock()
+        stack.append(state.iter_successors())
+        queue_time += clock() - start
+        peak_frontier = max(peak_frontier, len(stack))
+
+    if stats is not None:
+        # state0 came from the caller, not from a generator
+        stats.update(search_stats(expanded, generated - 1, duplicates, peak_frontier, len(explored), \
+            successor_time, queue_time))
+    return result
+
+def iddfs(state0, symmetry=False, stats=None):
+    """
+    Iterative deepening DFS: the depth first search of dfs, repeated with a depth limit of 0, 1,
+    2, ... until a goal is found, so the solution has the fewest possible moves.
+
+    Within one iteration a board is only searched again when it is reached at a lower depth than
+    before. Once an iteration is over, the lowest depth each board was reached at is its exact
+    distance from the initial board, so the next iteration only searches boards along shortest
+    paths and no board is expanded twice in one iteration.
+
+    :param state0: The initial state.
+    :type state0: Union[State, PackedState]
+    :param symmetry: Treat a board and its mirror image as the same board.
+    :type symmetry: bool
+    :param stats: If given, the search counters over all iterations are stored in it (see
+        search_stats).
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[Union[State, PackedState]]
+    """
+    clock = time.perf_counter
+    expanded = generated = duplicates = 0
+    peak_frontier = peak_explored = 1
+    successor_time = queue_time = 0.0
+    # Board -> exact distance from state0, for every board found by the previous iteration
+    distances = {}
+    limit = 0
+    result = None
+    while result is None:
+        # Board -> lowest depth it was searched at in this iteration
+        searched = {}
+        cut_off = False
+        stack = [iter([state0])]
+        generated -= 1  # state0 is not a successor
+        while stack:
+            start = clock()
+            state = next(stack[-1], None)
+            successor_time += clock() - start
+            if state is None:
+                start = clock()
+                stack.pop()
+                queue_time += clock() - start
+                continue
+            generated += 1
+            key = canonical_key(state.key) if symmetry else state.key
+            if state.depth > distances.get(key, limit) or searched.get(key, limit + 1) <= state.depth:
+                duplicates += 1
+                continue
+            searched[key] = state.depth
             if state.goal_state():
-                # If state is goal state, get goal path and return it
-                return state
+                result = state
+                break
+            if state.depth < limit:
+                expanded += 1
+                start = clock()
+                stack.append(state.iter_successors())
+                queue_time += clock() - start
+                peak_frontier = max(peak_frontier, len(stack))
             else:
-                # Add successors of state to frontier
-                successors = state.generate_successors()
-                frontier = frontier + successors
-    return None
-        
-def astar(state0):
-    # initialize frontier heap and explored set
-    frontier = []
-    heappush(frontier, (state0.f, state0.id, state0))
+                cut_off = True
+        peak_explored = max(peak_explored, len(searched))
+        if not cut_off:
+            # Every reachable board was searched without hitting the limit
+            break
+        distances = searched
+        limit += 1
+
+    if stats is not None:
+        stats.update(search_stats(expanded, generated, duplicates, peak_frontier, peak_explored, \
+            successor_time, queue_time))
+    return result
+
+# Estimated bytes a packed board takes in astar once explored (explored set, pushed dict, PathArena
+# and the int itself) and while queued (the PackedState, its pushed entry and open list slot).
+# Measured with tracemalloc on CPython 3.11; used to keep astar within --max-memory.
+explored_board_bytes = 160
+frontier_board_bytes = 250
+# Estimated bytes of one filled slot of the idastar transposition table
+table_slot_bytes = 120
+
+class MemoryBudgetExceeded(Exception):
+    """
+    Raised by astar when its explored set and open list outgrow max_memory.
+    """
+
+def best_first(state0, symmetry, heuristic, stats, open_list, weight, max_memory=None, reopen=False, \
+    on_goal=None, stop=None):
+    """
+    The search loop shared by astar and anytime_astar. States are expanded by smallest
+    f = g + weight * h, ties broken by the open list, and a board is only pushed again when it is
+    reached with a lower depth than before. Once a goal has been found, states whose unweighted
+    f (g + h) is not below its number of moves are dropped, since they cannot lead to a shorter
+    solution.
+
+    :param state0: The initial state.
+    :type state0: Union[State, PackedState]
+    :param symmetry: Treat a board and its mirror image as the same board.
+    :type symmetry: bool
+    :param heuristic: Heuristic for packed states, the Manhattan distance if None.
+    :type heuristic: Optional[Callable[[int], int]]
+    :param stats: If given, the search counters are stored in it (see search_stats). With
+        reopen, every board reached is kept, so they count as explored.
+    :type stats: Optional[dict]
+    :param open_list: Name of the open list (see open_lists). A fractional weight always uses
+        the heap, since the bucket open list needs integer f values.
+    :type open_list: str
+    :param weight: Weight of h in f.
+    :type weight: float
+    :param max_memory: If given, MemoryBudgetExceeded is raised once the estimated bytes of the
+        explored set and open list (see explored_board_bytes) would exceed it.
+    :type max_memory: Optional[int]
+    :param reopen: Expand a board again whenever it is reached with a lower depth, instead of at
+        most once.
+    :type reopen: bool
+    :param on_goal: Called with (goal, queued) for every goal found, where queued iterates over
+        the states left to expand. The search goes on for a shorter solution if it returns
+        True, and stops at the first goal if on_goal is None.
+    :type on_goal: Optional[Callable[[PackedState, Iterable], bool]]
+    :param stop: Called every 256 expansions once a goal was found. The search stops if it
+        returns True.
+    :type stop: Optional[Callable[[], bool]]
+    :return: The goal state of the last solution found, or None if there is none.
+    :rtype: Optional[PackedState]
+    """
+    if weight == int(weight):
+        weight = int(weight)
+    else:
+        open_list = 'heap'
+    clock = time.perf_counter
+    expanded = generated = duplicates = 0
+    peak_frontier = 1
+    successor_time = queue_time = 0.0
+    arena = PathArena()
+    state0.index = arena.add(state0.key)
+    frontier = open_lists[open_list]()
+    frontier.push(state0.f, state0)
     explored = set()
+    # Lowest depth each board has been pushed with. Only pushing a board again when it is reached
+    # with a lower depth (so a lower f) keeps (f, id) unique in the heap and the heap small.
+    pushed = {canonical_key(state0.key) if symmetry else state0.key: state0.depth}
+    best = None
+    exceeded = False
+
+    def unweighted(state):
+        # g + h of a state whose f is g + weight * h
+        return state.depth + (state.f - state.depth) / weight
+
+    def queued():
+        # The states of frontier that were neither expanded nor pushed again since
+        for state in frontier:
+            key = canonical_key(state.key) if symmetry else state.key
+            if key not in explored and state.depth == pushed[key]:
+                yield state
 
     while frontier:
         # while frontier is not empty
-        # remove based on smallest f value. If tie, remove based on id
-        state_tup = heappop(frontier)
-        state = state_tup[2]
+        if stop is not None and best is not None and expanded % 256 == 0 and stop():
+            break
+        # remove based on smallest f value. Ties are broken by the open list
+        start = clock()
+        state = frontier.pop()
+        queue_time += clock() - start
+        key = canonical_key(state.key) if symmetry else state.key
+
+        if key in explored or (reopen and state.depth > pushed[key]):
+            # An older copy of a board that has since been expanded or reached with a lower depth
+            duplicates += 1
+            continue
+        if not reopen:
+            explored.add(key)
+        if best is not None and unweighted(state) >= best.depth:
+            continue
+        if state.goal_state():
+            # If state is goal state, get goal path and return it unless on_goal wants a shorter one
+            best = arena.path(state.index)
+            if on_goal is None or not on_goal(best, queued()):
+                break
+            continue
+        # Add successors of state to frontier
+        expanded += 1
+        start = clock()
+        successors = state.generate_successors(weight=weight) if heuristic is None \
+            else state.generate_successors(heuristic, weight)
+        successor_time += clock() - start
+        generated += len(successors)
+        for successor in successors:
+            key = canonical_key(successor.key) if symmetry else successor.key
+            # A board whose heuristic is infinite cannot reach the goal
+            if key not in explored and successor.depth < pushed.get(key, successor.depth + 1) \
+                and successor.f != float('inf') and (best is None or unweighted(successor) < best.depth):
+                pushed[key] = successor.depth
+                successor.parent = None
+                successor.index = arena.add(successor.key, state.index)
+                start = clock()
+                frontier.push(successor.f, successor)
+                queue_time += clock() - start
+            else:
+                duplicates += 1
+        peak_frontier = max(peak_frontier, len(frontier))
+        if max_memory is not None and \
+            len(explored) * explored_board_bytes + len(frontier) * frontier_board_bytes > max_memory:
+            exceeded = True
+            break
+
+    if stats is not None:
+        stats.update(search_stats(expanded, generated, duplicates, peak_frontier, \
+            len(pushed) if reopen else len(explored), successor_time, queue_time))
+    if exceeded:
+        raise MemoryBudgetExceeded('{} boards explored and {} queued exceed {} bytes'.format(len(explored), \
+            len(frontier), max_memory))
+    return best
+
+def astar(state0, symmetry=False, heuristic=None, stats=None, open_list='bucket', weight=1, max_memory=None):
+    # initialize frontier (one of open_lists) and explored set, and search (see best_first)
+    # With symmetry, explored and pushed are keyed by canonical_key. States keep their actual
+    # boards, so the parent chain (and get_path) is still a real, un-mirrored move sequence.
+    # heuristic (packed states only) replaces the Manhattan distance of generate_successors.
+    # weight > 1 is weighted A* (f = g + weight * h): usually far fewer expansions, and the
+    # solution is at most weight times longer than the shortest. The bucket open list needs
+    # integer f values, so a fractional weight uses the heap.
+    # If stats is a dict, the search counters are stored in it (see search_stats).
+    # Parents are kept in a PathArena rather than in the states, so an expanded state is freed
+    # and the returned goal is a PackedState chain holding only the solution path.
+    # With max_memory (bytes), MemoryBudgetExceeded is raised once the estimated size of the explored
+    # set and open list (packed states, see explored_board_bytes) would exceed it.
+    return best_first(state0, symmetry, heuristic, stats, open_list, weight, max_memory)
+
+def bounded_astar(state0, max_memory, heuristic=manhattan, weight=1, symmetry=False, open_list='bucket', \
+    report=None, stats=None):
+    """
+    A* within a memory budget. If the explored set and open list of astar outgrow max_memory, they
+    are dropped and the puzzle is solved again by idastar, which only keeps the current path and
+    a transposition table sized to the same budget. It expands boards again, the more often the
+    smaller the table, so it can be tens of times slower than astar, but its memory does not grow
+    with the search. The fallback always returns a shortest solution, even when weight > 1.
+
+    :param state0: The initial state.
+    :type state0: PackedState
+    :param max_memory: Budget in bytes for the boards kept by the search. The move table and
+        pattern database are not counted.
+    :type max_memory: int
+    :param heuristic: Admissible heuristic, a function of the packed board.
+    :type heuristic: Callable[[int], int]
+    :param weight: Weight of h for astar, see astar.
+    :type weight: float
+    :param symmetry: Whether astar merges mirror images. idastar does not.
+    :type symmetry: bool
+    :param open_list: Open list used by astar, one of open_lists.
+    :type open_list: str
+    :param report: If given, called with the reason when falling back to idastar.
+    :type report: Optional[Callable[[str], None]]
+    :param stats: If given, the counters of the search that found the solution are stored in it.
+        After a fallback, those of astar are under 'astar' and 'fallback' is 'idastar'.
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[PackedState]
+    """
+    if stats is None:
+        stats = {}
+    astar_stats = {}
+    try:
+        result = astar(state0, symmetry, heuristic, astar_stats, open_list, weight, max_memory)
+    except MemoryBudgetExceeded as error:
+        if report is not None:
+            report(str(error))
+        stats['astar'] = astar_stats
+        stats['fallback'] = 'idastar'
+        return idastar(state0, max(1, max_memory // table_slot_bytes), heuristic, stats)
+    stats.update(astar_stats)
+    return result
+
+def anytime_astar(state0, deadline, weight=2, heuristic=None, open_list='bucket', symmetry=False, report=None, \
+    stats=None):
+    """
+    Anytime weighted A*: the weighted search of astar, which keeps going after its first
+    solution. A board is reopened whenever it is reached with a lower depth, and boards whose
+    unweighted f (g + h) is not below the shortest solution found so far are dropped, since
+    they cannot lead to a shorter one. Every shorter solution replaces the previous one, until
+    the deadline passes or the open list runs out, which proves the last solution optimal.
+
+    With every solution, report is called with (moves, bound, seconds), where bound is the
+    smallest unweighted f left in the open list (or moves, once none is smaller). No solution
+    is shorter than bound, and when bound == moves the solution is optimal.
+
+    :param state0: The initial state.
+    :type state0: Union[State, PackedState]
+    :param deadline: Seconds after which the best solution so far is returned. The search
+        always runs until it has a first solution.
+    :type deadline: float
+    :param weight: Weight of h in f = g + weight * h.
+    :type weight: float
+    :param heuristic: Admissible heuristic for packed states, Manhattan distance if None.
+    :type heuristic: Optional[Callable[[int], int]]
+    :param open_list: Name of the open list (see open_lists).
+    :type open_list: str
+    :param symmetry: Treat a board and its mirror image as the same board.
+    :type symmetry: bool
+    :param report: Called with (moves, bound, seconds) for every solution found.
+    :type report: Optional[Callable[[int, int, float], None]]
+    :param stats: If given, the search counters (see search_stats) and the list of
+        'improvements' as dicts of moves, bound and seconds are stored in it.
+    :type stats: Optional[dict]
+    :return: The goal state of the shortest solution found, or None if there is none.
+    :rtype: Optional[PackedState]
+    """
+    if stats is None:
+        stats = {}
+    stats['improvements'] = []
+    start = time.perf_counter()
+    timed_out = False
+
+    def improve(goal, queued):
+        # Smallest g + h among the boards left to expand
+        bound = min((state.depth + (state.f - state.depth) / weight for state in queued), default=goal.depth)
+        bound = min(goal.depth, -int(-bound // 1))
+        seconds = time.perf_counter() - start
+        stats['improvements'].append({'moves': goal.depth, 'bound': bound, 'seconds': round(seconds, 6)})
+        if report is not None:
+            report(goal.depth, bound, seconds)
+        return True
+
+    def past_deadline():
+        nonlocal timed_out
+        timed_out = time.perf_counter() - start > deadline
+        return timed_out
+
+    best = best_first(state0, symmetry, heuristic, stats, open_list, weight, reopen=True, on_goal=improve, \
+        stop=past_deadline)
+
+    if best is not None and not timed_out and stats['improvements'][-1]['bound'] < best.depth:
+        # Nothing shorter was left to find, so the last solution is optimal
+        seconds = time.perf_counter() - start
+        stats['improvements'].append({'moves': best.depth, 'bound': best.depth, 'seconds': round(seconds, 6)})
+        if report is not None:
+            report(best.depth, best.depth, seconds)
+    return best
+
+def idastar(state0, table_size=1 << 18, heuristic=manhattan, stats=None):
+    """
+    Iterative deepening A*: repeated depth first searches bounded by f, where only the current
+    path and a transposition table of at most table_size boards are kept in memory.
+
+    The table is a fixed list of table_size slots; a board lives in one slot picked by hashing it,
+    as (board, iteration, g, h). g is the lowest depth the board was searched at in the current
+    iteration, so reaching it again at the same or a higher depth is pruned. h is the best lower
+    bound learned for the board, which carries over to later iterations. It starts at the
+    heuristic and is raised to the lowest f, less g, that any way from the board to a goal can
+    have. The search does not move back onto the current path, so a move onto a board on it at
+    depth d counts as one move plus bound - d: no solution is shorter than bound, so no board
+    reached at depth d is fewer than bound - d moves from a goal. Learned h values keep growing
+    on boards that cannot reach a goal, so an iteration where only they cut boards off is
+    followed by one that prunes by the heuristic alone. Once an iteration cuts nothing off,
+    every reachable board was searched and there is no solution. On a collision the board
+    searched closer to the root keeps the slot, since it prunes the larger subtree.
+
+    :param state0: The initial state.
+    :type state0: PackedState
+    :param table_size: Maximum number of boards kept in the transposition table.
+    :type table_size: int
+    :param heuristic: Admissible heuristic, a function of the packed board.
+    :type heuristic: Callable[[int], int]
+    :param stats: If given, the number of expanded boards is stored in it under 'expanded'.
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[PackedState]
+    """
+    if stats is None:
+        stats = {}
+    stats['expanded'] = 0
+    table = [None] * table_size
+    path = [state0.code]
+    # Depth of each board on path, so cycles are cut even when their table slot was taken by
+    # another board
+    on_path = {state0.code: 0}
+    iteration = 0
+    # Whether the current iteration cut off a board by its heuristic, and whether it cut off one
+    # only by its learned h, which hides whether boards below it would have been cut off
+    cut = hidden = False
+    # Whether learned h values may cut boards off in the current iteration
+    learned = True
+
+    def search(code, g, bound):
+        # Returns the lowest f any way from code to a goal can have, at least the smallest f that
+        # exceeded bound below code, or None once a goal is on path
+        nonlocal cut, hidden
+        # hash() of an int is the int modulo a prime, which would leave boards that only differ in
+        # their last cells in the same slot; multiplying first spreads every cell over the slot
+        slot = hash(code * 0x9E3779B97F4A7C15) % table_size
+        entry = table[slot]
+        if entry is not None and entry[0] != code:
+            entry = None
+        h = heuristic(code) if entry is None else entry[3]
+        if g + h > bound:
+            if entry is None or g + heuristic(code) > bound:
+                # An infinite heuristic means no goal can be reached from code
+                cut = cut or h != float('inf')
+                return g + h
+            if learned:
+                hidden = True
+                return g + h
+        if code & goal_mask == goal_bits:
+            return None
+        if entry is not None and entry[1] == iteration and entry[2] <= g:
+            # Already searched this iteration from a depth at least as low
+            return g + h
+        other = table[slot]
+        if other is None or entry is not None or other[1] != iteration or other[2] >= g:
+            table[slot] = entry = (code, iteration, g, h)
+
+        stats['expanded'] += 1
+        minimum = float('inf')
+        for mask, bits, delta in move_entries(code):
+            if code & mask != bits:
+                continue
+            depth = on_path.get(code + delta)
+            if depth is not None:
+                # Not searched again, but a way back through it costs at least bound - depth more
+                minimum = min(minimum, g + 1 + bound - depth)
+                continue
+            path.append(code + delta)
+            on_path[code + delta] = g + 1
+            t = search(code + delta, g + 1, bound)
+            if t is None:
+                return None
+            path.pop()
+            del on_path[code + delta]
+            minimum = min(minimum, t)
+        # Every way out of code costs at least minimum - g. minimum is only infinite on a board
+        # without a legal move, and is then not kept
+        if minimum != float('inf') and minimum - g > h and table[slot] is entry:
+            table[slot] = (code, iteration, g, minimum - g)
+        return minimum
+
+    bound = heuristic(state0.code)
+    while True:
+        iteration += 1
+        cut = hidden = False
+        # search recurses once per move on path, and path never gets longer than bound
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), bound + 100))
+        t = search(state0.code, 0, bound)
+        if t is None:
+            break
+        if not cut and not hidden:
+            # Every board that can be reached was searched
+            return None
+        # If only learned h values cut boards off, check without them whether any board is left
+        learned = cut
+        # Pruned transpositions can report bounds that were already searched
+        bound = max(t, bound + 1)
+
+    # Rebuild the states along the solution path
+    state = state0
+    for code in path[1:]:
+        state = PackedState(code, 0, state.depth + 1, state)
+    return state
+
+def hda_owner(code, workers):
+    # Worker that owns a packed board. Multiplying first spreads every cell over the result,
+    # as in the slots of idastar.
+    return hash(code * 0x9E3779B97F4A7C15) % workers
+
+def hda_worker(index, workers, inboxes, controls, results, heuristic, batch_size, open_list, size):
+    """
+    One worker process of hdastar. It owns the boards with hda_owner(board) == index, keeping
+    their open list and best known (g, parent board), and answers the messages of hdastar:
+
+    ('start', board): add the initial board.
+    ('round', incumbent): expand up to batch_size of its best boards whose f is below incumbent
+        (the length of the shortest solution found so far), send the successors owned by every
+        other worker to that worker's inbox as one batch, add the workers - 1 batches it
+        receives and report (index, lowest f left, best goal as (moves, board) or None, expanded).
+    ('trace', board): report (board, parent board) for a board it owns.
+    ('stop',): exit.
+
+    size is the (width, height) of the board, since a spawned process starts at the default size.
+    """
+    set_board_size(*size)
+    heuristic = heuristics[heuristic]
+    frontier = open_lists[open_list]()
+    best = {}
+    goal = None
+
+    def add(code, g, parent):
+        # Keep a board if it is new or reached with a lower g. Goals are recorded, not expanded.
+        nonlocal goal
+        entry = best.get(code)
+        if entry is not None and entry[0] <= g:
+            return
+        best[code] = (g, parent)
+        if code & goal_mask == goal_bits:
+            if goal is None or g < goal[0]:
+                goal = (g, code)
+            return
+        h = heuristic(code)
+        if h != float('inf'):
+            frontier.push(g + h, PackedState(code, g + h, g))
+
+    def lowest_f():
+        # Smallest f in the open list, dropping boards that were reached with a lower g since
+        while frontier:
+            state = frontier.pop()
+            if state.depth == best[state.code][0]:
+                frontier.push(state.f, state)
+                return state.f
+        return float('inf')
+
+    while True:
+        message = controls[index].get()
+        if message[0] == 'stop':
+            return
+        if message[0] == 'start':
+            add(message[1], 0, None)
+            continue
+        if message[0] == 'trace':
+            results.put((message[1], best[message[1]][1]))
+            continue
+
+        incumbent = message[1]
+        outgoing = [[] for other in range(workers)]
+        expanded = 0
+        while expanded < batch_size and lowest_f() < min(incumbent, float('inf') if goal is None else goal[0]):
+            state = frontier.pop()
+            code, g = state.code, state.depth
+            expanded += 1
+            for mask, bits, delta in move_entries(code):
+                if code & mask == bits:
+                    owner = hda_owner(code + delta, workers)
+                    if owner == index:
+                        add(code + delta, g + 1, code)
+                    else:
+                        outgoing[owner].append((code + delta, g + 1, code))
+        for other in range(workers):
+            if other != index:
+                inboxes[other].put(outgoing[other])
+        for other in range(workers - 1):
+            for code, g, parent in inboxes[index].get():
+                add(code, g, parent)
+        results.put((index, lowest_f(), goal, expanded))
+
+def hdastar(state0, workers=None, heuristic='manhattan', batch_size=1024, open_list='bucket', stats=None):
+    """
+    Hash distributed A*: the boards are split between worker processes by hda_owner and every
+    worker runs A* on its own boards (see hda_worker). Workers expand in rounds and trade the
+    successors that belong to other workers in batches at the end of each round, so between
+    rounds every board generated so far has reached its owner. The search stops after the first
+    round in which no worker has a board with f below the shortest solution found. With a
+    consistent heuristic no shorter solution can exist then, so the path is optimal.
+
+    :param state0: The initial state.
+    :type state0: PackedState
+    :param workers: Number of worker processes, the number of CPUs by default.
+    :type workers: Optional[int]
+    :param heuristic: Name of a consistent heuristic in heuristics.
+    :type heuristic: str
+    :param batch_size: Boards each worker expands per round.
+    :type batch_size: int
+    :param open_list: Name of the open list (see open_lists) of every worker.
+    :type open_list: str
+    :param stats: If given, the number of expanded boards over all workers is stored in it under
+        'expanded'.
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[PackedState]
+    """
+    if stats is None:
+        stats = {}
+    stats['expanded'] = 0
+    if workers is None:
+        workers = os.cpu_count()
+    inboxes = [Queue() for index in range(workers)]
+    controls = [Queue() for index in range(workers)]
+    results = Queue()
+    processes = [Process(target=hda_worker, args=(index, workers, inboxes, controls, results, \
+        heuristic, batch_size, open_list, (width, height)), daemon=True) for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    def receive():
+        # Next report from a worker, raising instead of waiting forever if a worker died
+        while True:
+            try:
+                return results.get(timeout=1)
+            except Empty:
+                if any(process.exitcode not in (None, 0) for process in processes):
+                    raise RuntimeError('an hdastar worker exited unexpectedly')
+
+    try:
+        controls[hda_owner(state0.code, workers)].put(('start', state0.code))
+        # Shortest solution found so far, as (moves, goal board)
+        incumbent = None
+        while True:
+            for control in controls:
+                control.put(('round', float('inf') if incumbent is None else incumbent[0]))
+            lowest = float('inf')
+            for index in range(workers):
+                worker, f, goal, expanded = receive()
+                stats['expanded'] += expanded
+                lowest = min(lowest, f)
+                if goal is not None and (incumbent is None or goal[0] < incumbent[0]):
+                    incumbent = goal
+            if incumbent is None and lowest == float('inf'):
+                return None
+            if incumbent is not None and incumbent[0] <= lowest:
+                break
+
+        # Walk the parents back from the goal, asking the owner of each board
+        codes = []
+        code = incumbent[1]
+        while code is not None:
+            codes.append(code)
+            controls[hda_owner(code, workers)].put(('trace', code))
+            code = receive()[1]
+    finally:
+        for control in controls:
+            control.put(('stop',))
+        for process in processes:
+            # A worker still waiting for the batch of a worker that died never reads its stop
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+
+    state = None
+    for depth, code in enumerate(reversed(codes)):
+        state = PackedState(code, 0, depth, state)
+    return state
 
-        if str(state.board.grid) not in explored:
-            explored.add(str(state.board.grid))
-            if state.goal_state():
-                # If state is goal state, get goal path and return it
-                return state
+#====================================================================================
+# Distance table
+#
+# Every move can be undone, so a BFS started from all goal boards with the same pieces as a
+# puzzle finds the exact number of moves left for every board that can still be solved. The
+# distances are written to a file that is memory mapped to answer puzzles by greedy descent.
+#
+# File layout (little endian): a header (table_header), the sorted packed boards as uint64,
+# then the distance of each board as uint16 in the same order.
+
+table_magic = b'HRDT'
+table_header = struct.Struct('<4sHHHHHHQ')
+
+def piece_counts(code):
+    # Number of kings, singles, horizontal and vertical pieces on a packed board
+    counts = {code_goal: 0, code_single: 0, code_left: 0, code_top: 0}
+    for y in range(height):
+        for x in range(width):
+            ch = cell_at(code, x, y)
+            if ch in counts:
+                counts[ch] += 1
+    counts[code_goal] //= 4
+    return counts[code_goal], counts[code_single], counts[code_left], counts[code_top]
+
+def goal_codes(counts):
+    """
+    Generate every packed goal board (king at (goal_x, goal_y)) holding the given pieces.
+
+    :param counts: The (kings, singles, horizontal, vertical) counts from piece_counts.
+    :type counts: Tuple[int, int, int, int]
+    """
+    kings, singles, horizontals, verticals = counts
+    empties = width * height - 4 * kings - singles - 2 * horizontals - 2 * verticals
+    remaining = {code_empty: empties, code_single: singles, code_left: horizontals, code_top: verticals}
+    cells = width * height
+
+    def place(index, code, covered):
+        # Fill the first uncovered cell at or after index with each piece that fits there
+        while index < cells and covered >> index & 1:
+            index += 1
+        if index == cells:
+            yield code
+            return
+        x, y = index % width, index // width
+        for piece in (code_empty, code_single, code_left, code_top):
+            if remaining[piece] == 0:
+                continue
+            if piece == code_empty:
+                bits, mask = 0, 1 << index
+            elif not piece_fits(piece, x, y):
+                continue
             else:
-                # Add successors of state to frontier
-                successors = state.generate_successors()
-                for successor in successors:
-                    heappush(frontier, (successor.f, successor.id, successor))
-    return None
+                bits = piece_bits(piece, x, y)
+                mask = sum(1 << (index + dy * width + dx) for dx, dy, ch in piece_shapes[piece])
+                if covered & mask:
+                    continue
+            remaining[piece] -= 1
+            yield from place(index + 1, code | bits, covered | mask)
+            remaining[piece] += 1
+
+    king_cover = sum(1 << ((goal_y + dy) * width + goal_x + dx) for dx, dy, ch in piece_shapes[code_goal])
+    yield from place(0, goal_bits, king_cover)
+
+def build_distances(counts):
+    """
+    Backward BFS from every goal board with the given pieces.
+
+    :return: The exact number of moves to a goal for every board that can reach one.
+    :rtype: Dict[int, int]
+    """
+    distances = {}
+    layer = []
+    for code in goal_codes(counts):
+        distances[code] = 0
+        layer.append(code)
+    depth = 0
+    while layer:
+        # Moves are reversible, so the boards one move away from the layer are one move further from a goal
+        depth += 1
+        next_layer = []
+        for code in layer:
+            for mask, bits, delta in move_entries(code):
+                if code & mask == bits and code + delta not in distances:
+                    distances[code + delta] = depth
+                    next_layer.append(code + delta)
+        layer = next_layer
+    return distances
+
+def bidirectional(state0, stats=None):
+    """
+    Breadth first search from the initial board and, at the same time, backwards from every
+    goal board with the same pieces (see goal_codes), always growing the side with the smaller
+    frontier by one whole layer. Moves are reversible, so the backward side uses the same
+    moves. Once a layer reaches a board seen by the other side, the shortest meeting in that
+    layer joins the two halves into an optimal path.
+
+    :param state0: The initial state.
+    :type state0: PackedState
+    :param stats: If given, the search counters of both sides are stored in it (see
+        search_stats). The open list is the two current layers, which are swapped whole, so no
+        queue time is counted.
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[PackedState]
+    """
+    clock = time.perf_counter
+    expanded = generated = duplicates = 0
+    successor_time = 0.0
+    # Board -> (depth from its side's start, neighbour one move closer to that start)
+    forward = {state0.code: (0, None)}
+    backward = {}
+    for code in goal_codes(piece_counts(state0.code)):
+        backward[code] = (0, None)
+    forward_layer = [state0.code]
+    backward_layer = list(backward)
+    peak_frontier = len(forward_layer) + len(backward_layer)
+
+    meet = state0.code if state0.code in backward else None
+    while meet is None and forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            seen, other, layer = forward, backward, forward_layer
+        else:
+            seen, other, layer = backward, forward, backward_layer
+        best = None
+        next_layer = []
+        start = clock()
+        for code in layer:
+            depth = seen[code][0] + 1
+            expanded += 1
+            for mask, bits, delta in move_entries(code):
+                if code & mask != bits:
+                    continue
+                generated += 1
+                if code + delta in seen:
+                    duplicates += 1
+                    continue
+                seen[code + delta] = (depth, code)
+                next_layer.append(code + delta)
+                if code + delta in other:
+                    length = depth + other[code + delta][0]
+                    if best is None or length < best[0]:
+                        best = (length, code + delta)
+        successor_time += clock() - start
+        if layer is forward_layer:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+        peak_frontier = max(peak_frontier, len(forward_layer) + len(backward_layer))
+        if best is not None:
+            meet = best[1]
+    if stats is not None:
+        stats.update(search_stats(expanded, generated, duplicates, peak_frontier, len(forward) + len(backward), \
+            successor_time, 0.0))
+    if meet is None:
+        return None
+
+    # Start -> meet from the forward parents, then meet -> goal from the backward ones
+    codes = []
+    code = meet
+    while code is not None:
+        codes.append(code)
+        code = forward[code][1]
+    codes.reverse()
+    code = backward[meet][1]
+    while code is not None:
+        codes.append(code)
+        code = backward[code][1]
+
+    state = state0
+    for code in codes[1:]:
+        state = PackedState(code, 0, state.depth + 1, state)
+    return state
+
+def write_distance_table(filename, counts, distances):
+    # Save the distances as sorted uint64 boards followed by their uint16 distances
+    if 3 * width * height > 64:
+        raise ValueError('{}x{} boards do not fit in the uint64 keys of a distance table'.format(width, height))
+    keys = array('Q', sorted(distances))
+    values = array('H', [distances[key] for key in keys])
+    with open(filename, 'wb') as table_file:
+        table_file.write(table_header.pack(table_magic, width, height, *counts, len(keys)))
+        keys.tofile(table_file)
+        values.tofile(table_file)
+
+class DistanceTable:
+    """
+    Read only, memory mapped view of a file written by write_distance_table. Lookups are a
+    binary search over the mapped boards, so opening a table does not load it into memory.
+    """
+
+    def __init__(self, filename):
+        """
+        :param filename: The table file.
+        :type filename: str
+        """
+        with open(filename, 'rb') as table_file:
+            self.map = mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, table_width, table_height, *counts, size = table_header.unpack_from(self.map)
+        if magic != table_magic or (table_width, table_height) != (width, height):
+            raise ValueError('{} is not a {}x{} HRD distance table'.format(filename, width, height))
+        self.counts = tuple(counts)
+        view = memoryview(self.map)
+        keys_start = table_header.size
+        values_start = keys_start + 8 * size
+        self.keys = view[keys_start:values_start].cast('Q')
+        self.values = view[values_start:values_start + 2 * size].cast('H')
+
+    def distance(self, code):
+        # Moves left to a goal, or None if the board cannot reach one
+        index = bisect_left(self.keys, code)
+        if index < len(self.keys) and self.keys[index] == code:
+            return self.values[index]
+        return None
+
+def table_solve(state0, table, stats=None):
+    """
+    Solve a puzzle by always moving to a successor one move closer to a goal.
+
+    :param state0: The initial state.
+    :type state0: PackedState
+    :param table: The distance table built for the puzzle's pieces.
+    :type table: DistanceTable
+    :param stats: If given, the search counters are stored in it (see search_stats). Only the
+        boards on the solution are expanded, and nothing is queued or kept but the path.
+    :type stats: Optional[dict]
+    :return: The goal state, or None if the puzzle has no solution.
+    :rtype: Optional[PackedState]
+    """
+    if piece_counts(state0.code) != table.counts:
+        raise ValueError('distance table was built for different pieces')
+    clock = time.perf_counter
+    expanded = generated = 0
+    successor_time = 0.0
+    distance = table.distance(state0.code)
+    state = state0
+    while distance is not None and distance > 0:
+        expanded += 1
+        start = clock()
+        successors = state.generate_successors()
+        successor_time += clock() - start
+        for successor in successors:
+            generated += 1
+            if table.distance(successor.code) == distance - 1:
+                state = successor
+                distance -= 1
+                break
+    if stats is not None:
+        stats.update(search_stats(expanded, generated, 0, 0, 0, successor_time, 0.0))
+    return None if distance is None else state
+
+#====================================================================================
+# Solution cache
+#
+# Optimal solutions are kept in an SQLite file shared by every process using it. Each board of a
+# solution is stored under its canonical_key with the number of moves left and the next board,
+# both as seen from the canonical orientation, so any suffix of a cached solution is found too.
+# Every suffix of an optimal solution is optimal, so boards cached by different solves still
+# chain into an optimal path. Boards are stored as bytes starting with the board size, since
+# packed boards can be wider than an SQLite integer and boards of different sizes can pack to
+# the same int.
+
+class SolutionCache:
+    """
+    On-disk cache of optimal solutions. SQLite serializes writers and the write-ahead log lets
+    readers run alongside them, so several processes can share one file. Once it holds more
+    than max_boards boards, the least recently used ones are evicted.
+    """
+
+    def __init__(self, filename, max_boards=1 << 20):
+        """
+        :param filename: The cache file, created if it does not exist.
+        :type filename: str
+        :param max_boards: Number of boards kept before the least recently used are evicted.
+        :type max_boards: int
+        """
+        self.max_boards = max_boards
+        # Wait for other processes' writes instead of failing right away
+        self.db = sqlite3.connect(filename, timeout=60, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS boards '
+            '(board BLOB PRIMARY KEY, moves INTEGER NOT NULL, next BLOB, used REAL NOT NULL)')
+        self.db.execute('CREATE INDEX IF NOT EXISTS boards_used ON boards (used)')
+
+    def close(self):
+        self.db.close()
+
+    def pack(self, code):
+        # Stored form of a packed board: its width and height, then the board in little endian
+        return bytes((width, height)) + code.to_bytes((3 * width * height + 7) // 8, 'little')
+
+    def unpack(self, stored):
+        # Packed board of a stored one
+        return int.from_bytes(stored[2:], 'little')
+
+    def lookup(self, code):
+        """
+        Follow the cached next boards from a packed board to a goal.
+
+        :return: The goal state of a PackedState chain starting at code, or None if any board
+            of the path is missing.
+        :rtype: Optional[PackedState]
+        """
+        codes = [code]
+        moves = None
+        while True:
+            key = canonical_key(code)
+            row = self.db.execute('SELECT moves, next FROM boards WHERE board = ?', (self.pack(key),)).fetchone()
+            # A board evicted from the middle of a path leaves the rest of it unreachable
+            if row is None or (moves is not None and row[0] != moves - 1):
+                return None
+            moves, next_code = row
+            if moves == 0:
+                break
+            next_code = self.unpack(next_code)
+            code = next_code if key == code else mirror_code(next_code)
+            codes.append(code)
+
+        self.db.execute('BEGIN IMMEDIATE')
+        self.db.executemany('UPDATE boards SET used = ? WHERE board = ?', \
+            [(time.time(), self.pack(canonical_key(code))) for code in codes])
+        self.db.execute('COMMIT')
+        state = None
+        for depth, code in enumerate(codes):
+            state = PackedState(code, 0, depth, state)
+        return state
+
+    def store(self, soln):
+        """
+        Cache every board on an optimal solution, then evict the least recently used boards
+        over max_boards.
+
+        :param soln: The goal state of an optimal solution.
+        :type soln: Union[State, PackedState]
+        """
+        codes = []
+        while soln is not None:
+            codes.append(soln.key)
+            soln = soln.parent
+        codes.reverse()
+        rows = []
+        now = time.time()
+        for index, code in enumerate(codes):
+            key = canonical_key(code)
+            next_code = None
+            if index + 1 < len(codes):
+                next_code = codes[index + 1] if key == code else mirror_code(codes[index + 1])
+            rows.append((self.pack(key), len(codes) - 1 - index, None if next_code is None else self.pack(next_code), now))
+
+        self.db.execute('BEGIN IMMEDIATE')
+        # A board that is already cached keeps its own next board, which is just as short
+        self.db.executemany('INSERT OR IGNORE INTO boards VALUES (?, ?, ?, ?)', rows)
+        self.db.executemany('UPDATE boards SET used = ? WHERE board = ?', [(now, row[0]) for row in rows])
+        excess = self.db.execute('SELECT COUNT(*) FROM boards').fetchone()[0] - self.max_boards
+        if excess > 0:
+            # Among boards used at the same time, dropping the farthest from the goal first
+            # leaves the rest of their paths complete
+            self.db.execute('DELETE FROM boards WHERE board IN '
+                '(SELECT board FROM boards ORDER BY used, moves DESC LIMIT ?)', (excess,))
+        self.db.execute('COMMIT')
 
 if __name__ == "__main__":
 
@@ -751,21 +2282,187 @@ if __name__ == "__main__":
         "--algo",
         type=str,
         required=True,
-        choices=['astar', 'dfs'],
+        choices=['astar', 'dfs', 'iddfs', 'table', 'idastar', 'bidirectional', 'hdastar', 'wastar', 'anytime'],
         help="The searching algorithm."
     )
+    parser.add_argument(
+        "--tablefile",
+        type=str,
+        help="Distance table built by hrd_table.py, used by --algo table."
+    )
+    parser.add_argument(
+        "--tt-size",
+        type=int,
+        default=1 << 18,
+        help="Maximum number of boards in the transposition table of --algo idastar."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes of --algo hdastar."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1024,
+        help="Boards each --algo hdastar worker expands between two exchanges of successors."
+    )
+    parser.add_argument(
+        "--weight",
+        type=float,
+        default=2,
+        help="Weight w of h in f = g + w*h for --algo wastar and anytime."
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=1,
+        help="Seconds --algo anytime keeps improving its solution for."
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=float,
+        help="Megabytes the explored set and open list of --algo astar and wastar may use. Beyond it "
+            "the search falls back to idastar with a transposition table of the same size."
+    )
+    parser.add_argument(
+        "--heuristic",
+        type=str,
+        default='manhattan',
+        choices=sorted(heuristics),
+        help="Heuristic used by --algo astar, wastar, anytime, idastar and hdastar on the packed board, and by "
+            "the idastar fallback of --max-memory."
+    )
+    parser.add_argument(
+        "--open-list",
+        type=str,
+        default='bucket',
+        choices=sorted(open_lists),
+        help="Open list used by --algo astar, wastar, anytime and hdastar."
+    )
+    parser.add_argument(
+        "--verbose",
+        action='store_true',
+        help="Print the number of expanded states."
+    )
+    parser.add_argument(
+        "--board",
+        type=str,
+        default='packed',
+        choices=['packed', 'grid'],
+        help="Board representation used during the search."
+    )
+    parser.add_argument(
+        "--symmetry",
+        action='store_true',
+        help="Treat a board and its left-right mirror image as the same explored state."
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        help="Solution cache file, looked up before and filled after an optimal search."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=1 << 20,
+        help="Boards kept in --cache before the least recently used are evicted."
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        nargs='?',
+        const='-',
+        help="Write search statistics as JSON to this file, or to stdout if no file is given."
+    )
     args = parser.parse_args()
+    if args.algo == 'table' and args.tablefile is None:
+        parser.error("--algo table needs --tablefile")
+    if args.algo in ('table', 'idastar', 'bidirectional', 'hdastar') and args.board != 'packed':
+        parser.error("--algo {} only runs on the packed board".format(args.algo))
+    if args.max_memory is not None and args.algo not in ('astar', 'wastar'):
+        parser.error("--max-memory only applies to --algo astar and wastar")
+    if args.max_memory is not None and args.board != 'packed':
+        parser.error("--max-memory only runs on the packed board")
+    if args.heuristic != 'manhattan' and args.board != 'packed':
+        parser.error("--heuristic {} only runs on the packed board".format(args.heuristic))
 
     # read the board from the file and intiialize classes
     board, state0 = read_from_file(args.inputfile)
-
-    if args.algo == 'dfs':
-        soln = dfs(state0)
+    if args.board == 'packed':
+        state0 = pack_state(board)
+    heuristic = heuristics[args.heuristic]
+    stats = {}
+    start = time.perf_counter()
+
+    # Only searches that return a shortest solution use the cache
+    cache = None
+    soln = None
+    if args.cache is not None and args.algo not in ('dfs', 'wastar', 'anytime'):
+        cache = SolutionCache(args.cache, args.cache_size)
+        soln = cache.lookup(state0.key)
+        stats['cache'] = 'miss' if soln is None else 'hit'
+
+    if soln is not None:
+        # Answered from the cache
+        pass
+    elif args.algo == 'dfs':
+        soln = dfs(state0, args.symmetry, stats)
+    elif args.algo == 'iddfs':
+        soln = iddfs(state0, args.symmetry, stats)
+    elif args.max_memory is not None:
+        soln = bounded_astar(state0, int(args.max_memory * (1 << 20)), heuristic, \
+            args.weight if args.algo == 'wastar' else 1, args.symmetry, args.open_list, \
+            lambda reason: print('{}, falling back to idastar'.format(reason)), stats)
     elif args.algo == 'astar':
-        soln = astar(state0)
+        soln = astar(state0, args.symmetry, heuristic if args.board == 'packed' else None, stats, args.open_list)
+    elif args.algo == 'wastar':
+        soln = astar(state0, args.symmetry, heuristic if args.board == 'packed' else None, stats, args.open_list, \
+            args.weight)
+    elif args.algo == 'anytime':
+        soln = anytime_astar(state0, args.deadline, args.weight, heuristic if args.board == 'packed' else None, \
+            args.open_list, args.symmetry, lambda moves, bound, seconds: print( \
+            '{} moves, no solution under {}, {:.3f}s'.format(moves, bound, seconds)), stats)
+    elif args.algo == 'idastar':
+        soln = idastar(state0, args.tt_size, heuristic, stats)
+    elif args.algo == 'hdastar':
+        soln = hdastar(state0, args.workers, args.heuristic, args.batch_size, args.open_list, stats)
+    elif args.algo == 'bidirectional':
+        soln = bidirectional(state0, stats)
+    elif args.algo == 'table':
+        soln = table_solve(state0, DistanceTable(args.tablefile), stats)
+
+    if cache is not None:
+        if soln is not None and stats['cache'] == 'miss':
+            cache.store(soln)
+        cache.close()
+    seconds = time.perf_counter() - start
+
+    # Create output file, unless the puzzle has no solution
+    if soln is not None:
+        output_file(args.outputfile, soln)
+
+    if args.verbose and 'expanded' in stats:
+        print('{} states expanded'.format(stats['expanded']))
+
+    if args.stats is not None:
+        report = {'input': args.inputfile, 'algo': args.algo, 'board': args.board, 'heuristic': args.heuristic, \
+            'moves': None if soln is None else soln.depth, 'seconds': round(seconds, 6)}
+        report.update(stats)
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux but in bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            report['peak_memory_kb'] = peak // 1024 if sys.platform == 'darwin' else peak
+        if args.stats == '-':
+            print(json.dumps(report, indent=2))
+        else:
+            with open(args.stats, 'w') as stats_file:
+                json.dump(report, stats_file, indent=2)
+                stats_file.write('\n')
 
-    # Create output file
-    output_file(args.outputfile, soln)
+    if soln is None:
+        sys.exit('No solution')
     
 
 
@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import csv
+import glob
+import os
+import time
+from multiprocessing import Pool
+
+import hrd
+
+# Solves many puzzle files in parallel worker processes. Each solution is written next to its
+# puzzle, named like testhrd_easy1sol_astar.txt, and a summary line is printed per puzzle.
+
+solution_marker = 'sol_'
+
+def puzzle_files(pattern):
+    # Puzzle files of a directory (every .txt that is not a solution), or the files matching a glob
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '*.txt')
+    return sorted(filename for filename in glob.glob(pattern) \
+        if solution_marker not in os.path.basename(filename))
+
+def solution_file(filename, algo):
+    # testhrd_easy1.txt -> testhrd_easy1sol_astar.txt, in the same directory
+    root, ext = os.path.splitext(filename)
+    return '{}{}{}{}'.format(root, solution_marker, algo, ext)
+
+def solve(task):
+    """
+    Solve one puzzle file and write its solution. Runs in a worker process.
+
+    :param task: The puzzle file, algorithm and whether to use mirror symmetry.
+    :type task: Tuple[str, str, bool]
+    :return: (puzzle file, moves or None if unsolvable, seconds, error message or None)
+    :rtype: Tuple[str, Optional[int], float, Optional[str]]
+    """
+    filename, algo, symmetry = task
+    start = time.time()
+    try:
+        board, state0 = hrd.read_from_file(filename)
+        state0 = hrd.pack_state(board)
+        if algo == 'astar':
+            soln = hrd.astar(state0, symmetry)
+        else:
+            soln = hrd.dfs(state0, symmetry)
+        if soln is None:
+            return filename, None, time.time() - start, None
+        # get_path prints the move count, which would interleave between workers
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            hrd.output_file(solution_file(filename, algo), soln)
+        return filename, soln.depth, time.time() - start, None
+    except Exception as error:
+        # One bad file should not stop the rest of the batch
+        return filename, None, time.time() - start, '{}: {}'.format(type(error).__name__, error)
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--inputs",
+        type=str,
+        required=True,
+        help="A directory of puzzle files, or a glob such as 'puzzles/*.txt' (quote it)."
+    )
+    parser.add_argument(
+        "--algo",
+        type=str,
+        default='astar',
+        choices=['astar', 'dfs'],
+        help="The searching algorithm."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--symmetry",
+        action='store_true',
+        help="Treat a board and its left-right mirror image as the same explored state."
+    )
+    parser.add_argument(
+        "--summary",
+        type=str,
+        help="CSV file to write the summary to (file, moves, seconds, error)."
+    )
+    args = parser.parse_args()
+
+    filenames = puzzle_files(args.inputs)
+    if not filenames:
+        parser.error("no puzzle files match {}".format(args.inputs))
+
+    start = time.time()
+    results = []
+    with Pool(args.workers) as pool:
+        # Print each puzzle as soon as it is solved, slowest last
+        for filename, moves, seconds, error in pool.imap_unordered(solve, \
+            [(filename, args.algo, args.symmetry) for filename in filenames]):
+            if error is not None:
+                outcome = 'error ({})'.format(error)
+            elif moves is None:
+                outcome = 'no solution'
+            else:
+                outcome = '{} moves'.format(moves)
+            print('{}: {}, {:.2f}s'.format(filename, outcome, seconds))
+            results.append((filename, moves, seconds, error))
+
+    results.sort()
+    solved = [moves for filename, moves, seconds, error in results if moves is not None]
+    print('{} of {} puzzles solved, {:.2f}s total, {:.2f}s of solving'.format(len(solved), \
+        len(results), time.time() - start, sum(seconds for filename, moves, seconds, error in results)))
+
+    if args.summary is not None:
+        with open(args.summary, 'w', newline='') as summary_file:
+            writer = csv.writer(summary_file)
+            writer.writerow(['file', 'moves', 'seconds', 'error'])
+            for filename, moves, seconds, error in results:
+                writer.writerow([filename, '' if moves is None else moves, '{:.3f}'.format(seconds), error or ''])
@@ -0,0 +1,147 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import hrd
+from hrd_batch import puzzle_files
+from hrd_corpus import manifest_name
+
+# Times astar and dfs on a corpus written by hrd_corpus.py and compares the results with a
+# stored baseline. Exits with status 1 if astar missed a known optimum, or compared with the
+# baseline a search found a different number of moves, expanded more boards than the tolerance
+# allows on a puzzle, or took more time than the tolerance allows over the whole corpus. Times
+# of single puzzles are only printed, as they are too short to compare reliably.
+
+searches = {
+    'astar': lambda state0, stats: hrd.astar(state0, stats=stats),
+    'dfs': lambda state0, stats: hrd.dfs(state0, stats=stats),
+}
+
+def run(filename, algo, repeat):
+    """
+    Solve one puzzle repeat times on the packed board.
+
+    :return: The fastest time, and the moves and expanded boards of the solution.
+    :rtype: dict
+    """
+    board, state0 = hrd.read_from_file(filename)
+    best = None
+    for attempt in range(repeat):
+        stats = {}
+        state0 = hrd.pack_state(board)
+        start = time.perf_counter()
+        soln = searches[algo](state0, stats)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return {'seconds': round(best, 6), 'moves': None if soln is None else soln.depth, 'expanded': stats['expanded']}
+
+def compare(results, baseline, tolerance):
+    # Print each result next to its baseline and return the descriptions of the regressions
+    regressions = []
+    for name in sorted(results):
+        for algo, result in sorted(results[name].items()):
+            old = baseline.get(name, {}).get(algo)
+            line = '{:32} {:6} {:9.4f}s {:>6} moves {:>8} expanded'.format(name, algo, result['seconds'], \
+                str(result['moves']), result['expanded'])
+            if old is None:
+                print(line + '   (not in baseline)')
+                continue
+            print(line + '   x{:.2f} time, x{:.2f} expanded'.format(result['seconds'] / max(old['seconds'], 1e-6), \
+                result['expanded'] / max(old['expanded'], 1)))
+            if result['moves'] != old['moves']:
+                regressions.append('{} {}: {} moves, baseline {}'.format(name, algo, result['moves'], old['moves']))
+            if result['expanded'] > tolerance * old['expanded']:
+                regressions.append('{} {}: {} boards expanded, baseline {}'.format(name, algo, result['expanded'], \
+                    old['expanded']))
+    return regressions
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--corpus",
+        type=str,
+        required=True,
+        help="Directory of puzzles, usually written by hrd_corpus.py."
+    )
+    parser.add_argument(
+        "--algo",
+        type=str,
+        nargs='+',
+        default=sorted(searches),
+        choices=sorted(searches),
+        help="The searching algorithms to time."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Runs per puzzle and algorithm. The fastest one is kept."
+    )
+    parser.add_argument(
+        "--baseline",
+        type=str,
+        help="Results saved by an earlier --save to compare against."
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.25,
+        help="A total time or expanded count more than this many times its baseline is a regression."
+    )
+    parser.add_argument(
+        "--save",
+        type=str,
+        help="Write the results to this file, to be used as a later --baseline."
+    )
+    args = parser.parse_args()
+
+    optimal = {}
+    manifest_file = os.path.join(args.corpus, manifest_name)
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as manifest:
+            optimal = json.load(manifest)
+    filenames = puzzle_files(args.corpus)
+    if not filenames:
+        parser.error("no puzzle files in {}".format(args.corpus))
+
+    results = {}
+    problems = []
+    for filename in filenames:
+        name = os.path.basename(filename)
+        results[name] = {}
+        for algo in args.algo:
+            results[name][algo] = run(filename, algo, args.repeat)
+        if 'astar' in results[name] and name in optimal and results[name]['astar']['moves'] != optimal[name]:
+            problems.append('{} astar: {} moves, optimal is {}'.format(name, results[name]['astar']['moves'], optimal[name]))
+
+    baseline = {}
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    problems += compare(results, baseline, args.tolerance)
+
+    for algo in args.algo:
+        total = sum(result[algo]['seconds'] for result in results.values())
+        names = [name for name in results if algo in baseline.get(name, {})]
+        if not names:
+            print('{}: {:.3f}s in total'.format(algo, total))
+            continue
+        # Only the puzzles in the baseline are compared
+        total = sum(results[name][algo]['seconds'] for name in names)
+        old = sum(baseline[name][algo]['seconds'] for name in names)
+        print('{}: {:.3f}s in total, baseline {:.3f}s'.format(algo, total, old))
+        if total > args.tolerance * old:
+            problems.append('{}: {:.3f}s in total, baseline {:.3f}s'.format(algo, total, old))
+
+    if args.save is not None:
+        with open(args.save, 'w') as save_file:
+            json.dump(results, save_file, indent=2, sort_keys=True)
+            save_file.write('\n')
+
+    for problem in problems:
+        print('REGRESSION ' + problem)
+    sys.exit(1 if problems else 0)
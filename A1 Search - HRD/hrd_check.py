@@ -0,0 +1,99 @@
+import argparse
+import random
+import sys
+
+import hrd
+
+# Checks the packed engine against the grid engine on random boards of several sizes. On every
+# board, encode_grid/decode_grid must round trip, both engines must agree on the goal test, and
+# both must generate the same successors with the same f values. Exits with status 1 on the
+# first mismatch.
+
+def random_board(rng, width, height, empties):
+    """
+    A random board with the king somewhere, empties empty cells and every other cell covered by
+    singles and 1x2 pieces.
+
+    :rtype: Board
+    """
+    king_x, king_y = rng.randrange(width - 1), rng.randrange(height - 1)
+    pieces = [hrd.Piece(True, False, king_x, king_y, None)]
+    covered = set((king_x + dx, king_y + dy) for dx in (0, 1) for dy in (0, 1))
+    free = [(x, y) for y in range(height) for x in range(width) if (x, y) not in covered]
+    covered.update(rng.sample(free, min(empties, len(free))))
+    for y in range(height):
+        for x in range(width):
+            if (x, y) in covered:
+                continue
+            # A single always fits, so every cell gets covered
+            options = [(False, True, None)]
+            if x + 1 < width and (x + 1, y) not in covered:
+                options.append((False, False, 'h'))
+            if y + 1 < height and (x, y + 1) not in covered:
+                options.append((False, False, 'v'))
+            is_goal, is_single, orientation = rng.choice(options)
+            pieces.append(hrd.Piece(is_goal, is_single, x, y, orientation))
+            covered.add((x, y))
+            if orientation == 'h':
+                covered.add((x + 1, y))
+            elif orientation == 'v':
+                covered.add((x, y + 1))
+    return hrd.Board(pieces, width, height)
+
+def check_board(board):
+    # Description of the first difference between the two engines on board, or None
+    state = hrd.State(board, 0, 0, None)
+    packed = hrd.pack_state(board)
+    if hrd.decode_grid(packed.code) != board.grid:
+        return 'decode_grid(encode_grid(grid)) is not grid'
+    if packed.goal_state() != state.goal_state():
+        return 'goal test is {} packed, {} on the grid'.format(packed.goal_state(), state.goal_state())
+    packed_successors = sorted((successor.code, successor.f) for successor in packed.generate_successors())
+    grid_successors = sorted((successor.key, successor.f) for successor in state.generate_successors())
+    if packed_successors != grid_successors:
+        return '{} packed successors, {} on the grid, or their f differ'.format(len(packed_successors), \
+            len(grid_successors))
+    return None
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=str,
+        nargs='+',
+        default=['4x5', '5x5', '4x6', '6x5', '6x6'],
+        help="Board sizes to check, as WIDTHxHEIGHT."
+    )
+    parser.add_argument(
+        "--boards",
+        type=int,
+        default=200,
+        help="Random boards per size."
+    )
+    parser.add_argument(
+        "--max-empties",
+        type=int,
+        default=4,
+        help="Most empty cells on a random board."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=384,
+        help="Seed of the random boards, so a failure can be reproduced."
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        width, height = (int(part) for part in size.split('x'))
+        hrd.set_board_size(width, height)
+        for index in range(args.boards):
+            board = random_board(rng, width, height, rng.randint(1, args.max_empties))
+            problem = check_board(board)
+            if problem is not None:
+                print('{} board {}: {}'.format(size, index, problem))
+                board.display()
+                sys.exit(1)
+        print('{}: {} boards checked'.format(size, args.boards))
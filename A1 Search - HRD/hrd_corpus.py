@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import random
+
+import hrd
+
+# Generates benchmark puzzles with a known optimal number of moves. A backward BFS from every
+# goal board with the pieces of a template puzzle (hrd.build_distances) gives the exact distance
+# of every board that can reach a goal, so boards are drawn from those at each wanted distance.
+# The puzzles are written in the read_from_file format, with a corpus.json manifest mapping each
+# file to its optimal number of moves, which hrd_bench.py checks astar against.
+
+manifest_name = 'corpus.json'
+
+def write_board(filename, code):
+    # Write a packed board in the format read by hrd.read_from_file
+    with open(filename, 'w') as puzzle_file:
+        for row in hrd.decode_grid(code):
+            puzzle_file.write(''.join(row) + '\n')
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--inputfile",
+        type=str,
+        nargs='+',
+        required=True,
+        help="Template puzzles. Boards are generated with the pieces of each one."
+    )
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs='+',
+        required=True,
+        help="Optimal numbers of moves of the generated puzzles."
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=2,
+        help="Puzzles per template and depth."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=384,
+        help="Seed of the random choice of boards, so a corpus can be generated again."
+    )
+    parser.add_argument(
+        "--outdir",
+        type=str,
+        required=True,
+        help="Directory the puzzles and corpus.json are written to."
+    )
+    args = parser.parse_args()
+
+    os.makedirs(args.outdir, exist_ok=True)
+    manifest_file = os.path.join(args.outdir, manifest_name)
+    manifest = {}
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as existing:
+            manifest = json.load(existing)
+    rng = random.Random(args.seed)
+
+    for template in args.inputfile:
+        board, state0 = hrd.read_from_file(template)
+        distances = hrd.build_distances(hrd.piece_counts(hrd.encode_grid(board.grid)))
+        by_depth = {}
+        for code, depth in distances.items():
+            by_depth.setdefault(depth, []).append(code)
+        stem = os.path.splitext(os.path.basename(template))[0]
+
+        for depth in args.depths:
+            # Sorted first, so the same seed always picks the same boards
+            codes = sorted(by_depth.get(depth, []))
+            if len(codes) < args.count:
+                print('{}: only {} boards need {} moves (at most {})'.format(template, len(codes), depth, \
+                    max(by_depth)))
+            for index, code in enumerate(rng.sample(codes, min(args.count, len(codes)))):
+                name = '{}_d{:03d}_{}.txt'.format(stem, depth, index)
+                write_board(os.path.join(args.outdir, name), code)
+                manifest[name] = depth
+
+    with open(manifest_file, 'w') as output:
+        json.dump(dict(sorted(manifest.items())), output, indent=2)
+        output.write('\n')
+    print('{} puzzles in {}'.format(len(manifest), args.outdir))
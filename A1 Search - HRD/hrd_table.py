@@ -0,0 +1,32 @@
+import argparse
+import time
+
+import hrd
+
+# Builds the distance table used by `hrd.py --algo table` for the pieces of a puzzle
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--inputfile",
+        type=str,
+        required=True,
+        help="A puzzle with the pieces the table is built for."
+    )
+    parser.add_argument(
+        "--tablefile",
+        type=str,
+        required=True,
+        help="The distance table file to write."
+    )
+    args = parser.parse_args()
+
+    board, state0 = hrd.read_from_file(args.inputfile)
+    counts = hrd.piece_counts(hrd.encode_grid(board.grid))
+
+    start = time.time()
+    distances = hrd.build_distances(counts)
+    hrd.write_distance_table(args.tablefile, counts, distances)
+
+    print('{} boards, {} moves at most, {:.1f}s'.format(len(distances), max(distances.values()), time.time() - start))
@@ -1,9 +1,12 @@
 import argparse
 import copy
+import json
+import random
 import sys
 import time
 
-cache = {} # you can use this to implement state caching!
+# Depth of the alpha-beta search below the current position
+max_depth = 10
 
 class State:
     # This class is used to represent a state.
@@ -19,6 +22,7 @@ class State:
         self.switched = False
         self.eval = 0
         self.parent = None
+        self.zobrist = None
 
     def display(self):
         for i in self.board:
@@ -213,6 +217,10 @@ def get_next_turn(curr_turn):
 def simulate_successors(state, turn, dec):
     '''Get successors for current state by generating successors and filtering them based on jumps'''
     
+    if isinstance(state, BitState):
+        # The bitboard engine filters its successors itself
+        return state.generate_successors(turn)
+
     successors_jump = []
     successors_multi_jumps = []
 
@@ -807,77 +815,673 @@ def move_piece(state, piece_loc, move_loc):
     successor = State(successor_board)
     return [successor]
 
-def alpha_beta_search_max(state, turn, cache):
-    v, best_move = max_value(state, -100000, 100000, 0, turn, cache)
-    # Return the action with the value v
-    return best_move
+#====================================================================================
+# Bitboard engine
+# The 32 dark squares ((row + col) odd) are numbered row by row from the top left, 4 per row:
+# square s is on row s // 4, at column 2 * (s % 4) + 1 on even rows and 2 * (s % 4) on odd rows.
+# A position is 4 masks over those squares: red men (rm), red kings (rk), black men (bm) and
+# black kings (bk). Squares are numbered in the row major order generate_successors visits the
+# board in, and the neighbours of a square in the order move_check tries its directions, so
+# both engines list the successors of a position in the same order.
+
+square_count = 32
+full_mask = (1 << square_count) - 1
+directions = ['up_left', 'up_right', 'down_left', 'down_right']
+direction_steps = {'up_left': (-1, -1), 'up_right': (-1, 1), 'down_left': (1, -1), 'down_right': (1, 1)}
+opposite = {'up_left': 'down_right', 'up_right': 'down_left', 'down_left': 'up_right', 'down_right': 'up_left'}
+# Directions each piece moves and jumps in, in the order move_check tries them
+piece_directions = {'r': ['up_left', 'up_right'], 'b': ['down_left', 'down_right'], 'R': directions, 'B': directions}
+
+def square_at(row, col):
+    return row * 4 + col // 2
+
+def square_row_col(square):
+    row = square // 4
+    return row, 2 * (square % 4) + (row + 1) % 2
+
+def build_square_tables():
+    # neighbours[dir][s] is the square next to s in direction dir and jump_squares[dir][s] the
+    # one after it (None off the board). direction_shifts[dir] lists (squares, delta) pairs:
+    # every square of squares has its neighbour in dir at s + delta.
+    neighbours = {}
+    jump_squares = {}
+    direction_shifts = {}
+    for dir, (dy, dx) in direction_steps.items():
+        neighbours[dir] = []
+        jump_squares[dir] = []
+        deltas = {}
+        for square in range(square_count):
+            row, col = square_row_col(square)
+            near = far = None
+            if 0 <= row + dy < 8 and 0 <= col + dx < 8:
+                near = square_at(row + dy, col + dx)
+                deltas[near - square] = deltas.get(near - square, 0) | 1 << square
+            if 0 <= row + 2 * dy < 8 and 0 <= col + 2 * dx < 8:
+                far = square_at(row + 2 * dy, col + 2 * dx)
+            neighbours[dir].append(near)
+            jump_squares[dir].append(far)
+        direction_shifts[dir] = [(squares, delta) for delta, squares in deltas.items()]
+    return neighbours, jump_squares, direction_shifts
+
+neighbours, jump_squares, direction_shifts = build_square_tables()
+row_masks = [sum(1 << square_at(row, col) for col in range(8) if (row + col) % 2 == 1) for row in range(8)]
+edge_mask = row_masks[0] | row_masks[7] | sum(1 << square_at(row, col) for row in range(8) for col in (0, 7) \
+    if (row + col) % 2 == 1)
+inner_mask = full_mask & ~edge_mask
+# Squares a piece at each square can step onto, for each kind of piece. Squares are numbered so
+# that going through these in increasing order tries the directions in the order of move_check.
+step_masks = dict((piece, [sum(1 << neighbours[dir][square] for dir in piece_directions[piece] \
+    if neighbours[dir][square] is not None) for square in range(square_count)]) for piece in piece_directions)
+
+def count_bits(mask):
+    return bin(mask).count('1')
+
+def squares_of(mask):
+    # Squares of mask in increasing order
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def shift(mask, dir):
+    # The squares next to those of mask in direction dir
+    moved = 0
+    for squares, delta in direction_shifts[dir]:
+        if delta > 0:
+            moved |= (mask & squares) << delta
+        else:
+            moved |= (mask & squares) >> -delta
+    return moved
+
+def encode_board(board):
+    '''Masks (rm, rk, bm, bk) of an 8*8 board of characters'''
+    masks = {'r': 0, 'R': 0, 'b': 0, 'B': 0}
+    for row in range(8):
+        for col in range(8):
+            piece = board[row][col]
+            if piece in masks:
+                if (row + col) % 2 == 0:
+                    raise ValueError('{} on a light square at row {}, column {}'.format(piece, row, col))
+                masks[piece] |= 1 << square_at(row, col)
+    return masks['r'], masks['R'], masks['b'], masks['B']
+
+def decode_board(rm, rk, bm, bk):
+    '''8*8 board of characters of the masks'''
+    board = [['.'] * 8 for row in range(8)]
+    for piece, mask in (('r', rm), ('R', rk), ('b', bm), ('B', bk)):
+        for square in squares_of(mask):
+            row, col = square_row_col(square)
+            board[row][col] = piece
+    return board
+
+# Zobrist hashing: a random 64 bit key per piece and square. The hash of a board is the xor of
+# the keys of its pieces, so a move updates it by xoring the keys of the squares it changes.
+# The search xors side_keys[turn] in as well, as the same board with the other player to move
+# is a different position.
+zobrist_random = random.Random(384)
+zobrist_keys = dict((piece, [zobrist_random.getrandbits(64) for square in range(square_count)]) \
+    for piece in ('r', 'R', 'b', 'B'))
+side_keys = {'r': 0, 'b': zobrist_random.getrandbits(64)}
+
+def zobrist_masks(rm, rk, bm, bk):
+    '''Zobrist hash of the board of the masks'''
+    return zobrist_update(0, (0, 0, 0, 0), (rm, rk, bm, bk))
+
+def zobrist_update(zobrist, old, new):
+    '''Hash of the board new (rm, rk, bm, bk), given the hash of the board old'''
+    for piece, old_mask, new_mask in zip(('r', 'R', 'b', 'B'), old, new):
+        for square in squares_of(old_mask ^ new_mask):
+            zobrist ^= zobrist_keys[piece][square]
+    return zobrist
+
+def board_hash(state):
+    # Zobrist hash of the board of state. Bitboard states get theirs from their parent, grid
+    # states compute it from the board the first time it is needed.
+    if state.zobrist is None:
+        state.zobrist = zobrist_masks(*encode_board(state.board))
+    return state.zobrist
+
+def jumpers(men, kings, men_directions, opponents, empty):
+    '''Squares of the pieces that can jump'''
+    found = 0
+    for dir in directions:
+        back = opposite[dir]
+        # Opponents with an empty square behind them in dir, then the squares in front of those
+        targets = shift(shift(empty, back) & opponents, back)
+        found |= targets & (kings | (men if dir in men_directions else 0))
+    return found
+
+def jump_chains(square, king, men, kings, opp_men, opp_kings, men_directions, promotion, jumps, chains):
+    '''Continue the jumps of the piece on square like multi_jump does, adding every finished chain to chains as
+    (men, kings, opp_men, opp_kings, jumps). A man that reaches the promotion squares becomes a king and stops'''
+    opponents = opp_men | opp_kings
+    empty = full_mask & ~(men | kings | opponents)
+    piece = 1 << square
+    continued = False
+    for dir in (directions if king else men_directions):
+        over = neighbours[dir][square]
+        land = jump_squares[dir][square]
+        if land is None or not opponents >> over & 1 or not empty >> land & 1:
+            continue
+        continued = True
+        keep = ~(1 << over)
+        if king:
+            jump_chains(land, True, men, kings & ~piece | 1 << land, opp_men & keep, opp_kings & keep, \
+                men_directions, promotion, jumps + 1, chains)
+        elif promotion >> land & 1:
+            chains.append((men & ~piece, kings | 1 << land, opp_men & keep, opp_kings & keep, jumps + 1))
+        else:
+            jump_chains(land, False, men & ~piece | 1 << land, kings, opp_men & keep, opp_kings & keep, \
+                men_directions, promotion, jumps + 1, chains)
+    if not continued and jumps:
+        chains.append((men, kings, opp_men, opp_kings, jumps))
+
+def generate_moves(rm, rk, bm, bk, turn):
+    '''Moves of the player turn, filtered like simulate_successors: the multi jumps if there are any, else the
+    jumps, else the single steps. Each move is (rm, rk, bm, bk, jumps), the xor of each mask before and after
+    it and the number of pieces it captures, in the order of generate_successors'''
+    if turn == 'r':
+        men, kings, opp_men, opp_kings, promotion = rm, rk, bm, bk, row_masks[0]
+        make = lambda men, kings, opp_men, opp_kings, jumps: (men, kings, opp_men, opp_kings, jumps)
+    else:
+        men, kings, opp_men, opp_kings, promotion = bm, bk, rm, rk, row_masks[7]
+        make = lambda men, kings, opp_men, opp_kings, jumps: (opp_men, opp_kings, men, kings, jumps)
+    men_directions = piece_directions[turn]
+    empty = full_mask & ~(men | kings | opp_men | opp_kings)
+
+    can_jump = jumpers(men, kings, men_directions, opp_men | opp_kings, empty)
+    if can_jump:
+        chains = []
+        for square in squares_of(can_jump):
+            jump_chains(square, bool(kings >> square & 1), men, kings, opp_men, opp_kings, men_directions, \
+                promotion, 0, chains)
+        longest = max(chain[4] for chain in chains)
+        return [make(men ^ new_men, kings ^ new_kings, opp_men ^ new_opp_men, opp_kings ^ new_opp_kings, jumps) \
+            for new_men, new_kings, new_opp_men, new_opp_kings, jumps in chains if longest == 1 or jumps > 1]
+
+    moves = []
+    for square in squares_of(men | kings):
+        piece = 1 << square
+        if kings & piece:
+            for to in squares_of(step_masks['R'][square] & empty):
+                moves.append(make(0, piece | 1 << to, 0, 0, 0))
+        else:
+            for to in squares_of(step_masks[turn][square] & empty):
+                if promotion >> to & 1:
+                    moves.append(make(piece, 1 << to, 0, 0, 0))
+                else:
+                    moves.append(make(piece | 1 << to, 0, 0, 0, 0))
+    return moves
+
+def evaluate_masks(rm, rk, bm, bk):
+    '''State.eval_fnc of the board of the masks'''
+    if not (bm | bk):
+        return 100000
+    if not (rm | rk):
+        return -100000
+    reds = rm | rk
+    blacks = bm | bk
+    empty = full_mask & ~(reds | blacks)
+    # Pieces on the edges are safe from capture
+    eval = 3 * count_bits(rm & edge_mask) + count_bits(rm & inner_mask) + 5 * count_bits(rk & edge_mask) \
+        + 20 * count_bits(rk & inner_mask) - 3 * count_bits(bm & edge_mask) - count_bits(bm & inner_mask) \
+        - 5 * count_bits(bk & edge_mask) - 3 * count_bits(bk & inner_mask)
+    # Men closer to being crowned
+    for row in range(8):
+        eval += (7 - row) * count_bits(rm & row_masks[row]) - row * count_bits(bm & row_masks[row])
+    # is_king_threatened: opposing pieces and free squares next to each king
+    for dir in directions:
+        red_next = shift(rk, dir)
+        black_next = shift(bk, dir)
+        eval += count_bits(red_next & empty) - 3 * count_bits(red_next & blacks) \
+            + 3 * count_bits(black_next & reds) - count_bits(black_next & empty)
+    return eval
+
+class BitState(State):
+    # State on the bitboard engine. board is rebuilt from the masks when it is read (get_path,
+    # display), the search only uses the masks.
+    def __init__(self, rm, rk, bm, bk, zobrist=None):
+
+        self.rm = rm
+        self.rk = rk
+        self.bm = bm
+        self.bk = bk
+
+        self.width = 8
+        self.height = 8
+        self.single_jump = False
+        self.multi_jump = False
+        self.switched = False
+        self.eval = 0
+        self.parent = None
+        # Zobrist hash of the board, passed on from the parent by generate_successors
+        self.zobrist = zobrist_masks(rm, rk, bm, bk) if zobrist is None else zobrist
+
+    @property
+    def board(self):
+        return decode_board(self.rm, self.rk, self.bm, self.bk)
+
+    def is_goal_max(self):
+        '''Determine if board is a winner/goal state for r'''
+        return not (self.bm | self.bk)
+
+    def is_goal_min(self):
+        '''Determine if board is a winner/goal state for b'''
+        return not (self.rm | self.rk)
+
+    def eval_fnc(self, player):
+        '''Estimate player's utility of NON TERMINAL state, the same way as State.eval_fnc'''
+        self.eval = evaluate_masks(self.rm, self.rk, self.bm, self.bk)
+
+    def generate_successors(self, turn):
+        '''Successors for the player turn, see generate_moves'''
+        successors = []
+        for rm, rk, bm, bk, jumps in generate_moves(self.rm, self.rk, self.bm, self.bk, turn):
+            successor = self.child(self.rm ^ rm, self.rk ^ rk, self.bm ^ bm, self.bk ^ bk)
+            successor.single_jump = jumps > 0
+            successor.multi_jump = jumps > 1
+            successors.append(successor)
+        return successors
+
+    def child(self, rm, rk, bm, bk):
+        # Successor with the given masks. Its hash is updated for the squares that changed only.
+        return BitState(rm, rk, bm, bk, zobrist_update(self.zobrist, (self.rm, self.rk, self.bm, self.bk), \
+            (rm, rk, bm, bk)))
+
+class Move:
+    # A move on a Position. changes holds the xor of each mask (rm, rk, bm, bk) before and after
+    # the move, which covers the piece moving, the pieces it captures and its promotion, and
+    # zobrist the xor of the hashes. Making and unmaking the move are then the same xors.
+    # zobrist is only computed once it is needed (see move_zobrist), as after a cutoff most
+    # moves never are.
+    __slots__ = ('changes', 'zobrist', 'captures')
+
+    def __init__(self, changes, captures):
+
+        self.changes = changes
+        self.zobrist = None
+        self.captures = captures
+
+def move_zobrist(move):
+    # The xor of the hashes before and after move is the hash of the squares it changes
+    if move.zobrist is None:
+        move.zobrist = zobrist_masks(*move.changes)
+    return move.zobrist
+
+class Position:
+    # The position the search runs on: one set of masks that moves are made on and unmade from,
+    # instead of a new State per successor. States are only built for the moves game_time plays.
+    def __init__(self, rm, rk, bm, bk):
+
+        self.rm = rm
+        self.rk = rk
+        self.bm = bm
+        self.bk = bk
+        self.zobrist = zobrist_masks(rm, rk, bm, bk)
+
+    def is_goal_max(self):
+        return not (self.bm | self.bk)
+
+    def is_goal_min(self):
+        return not (self.rm | self.rk)
+
+    def evaluate(self, turn):
+        return evaluate_masks(self.rm, self.rk, self.bm, self.bk)
+
+    def moves(self, turn):
+        '''Moves of the player turn, in the order of generate_moves'''
+        return [Move(move[:4], move[4]) for move in generate_moves(self.rm, self.rk, self.bm, self.bk, turn)]
+
+    def make(self, move):
+        rm, rk, bm, bk = move.changes
+        self.rm ^= rm
+        self.rk ^= rk
+        self.bm ^= bm
+        self.bk ^= bk
+        self.zobrist ^= move_zobrist(move)
 
-def alpha_beta_search_min(state, turn, cache):
-    v, best_move = min_value(state, -100000, 100000, 0, turn, cache)
+    def unmake(self, move):
+        # The xors of a move undo themselves
+        self.make(move)
+
+    def move_hash(self, move):
+        # Zobrist hash of the board after move
+        return self.zobrist ^ move_zobrist(move)
+
+    def captures(self, move):
+        return move.captures
+
+    def move_key(self, move):
+        # The squares move changes, which are the same for the same move in other positions
+        # as long as it captures nothing
+        return move.changes
+
+    def successor(self, move):
+        '''The BitState of the board after move'''
+        rm, rk, bm, bk = move.changes
+        state = BitState(self.rm ^ rm, self.rk ^ rk, self.bm ^ bm, self.bk ^ bk, self.move_hash(move))
+        state.single_jump = move.captures > 0
+        state.multi_jump = move.captures > 1
+        return state
+
+class GridPosition:
+    # Position over the grid engine, for comparing the engines. Its moves are the States of
+    # simulate_successors and making one pushes it on a stack, so this engine still copies the
+    # board for every successor.
+    def __init__(self, state):
+
+        self.states = [state]
+
+    @property
+    def zobrist(self):
+        return board_hash(self.states[-1])
+
+    def is_goal_max(self):
+        return self.states[-1].is_goal_max()
+
+    def is_goal_min(self):
+        return self.states[-1].is_goal_min()
+
+    def evaluate(self, turn):
+        self.states[-1].eval_fnc(turn)
+        return self.states[-1].eval
+
+    def moves(self, turn):
+        return simulate_successors(self.states[-1], turn, dec=None)
+
+    def make(self, move):
+        self.states.append(move)
+
+    def unmake(self, move):
+        self.states.pop()
+
+    def move_hash(self, move):
+        return board_hash(move)
+
+    def captures(self, move):
+        before = encode_board(self.states[-1].board)
+        return sum(count_bits(mask) for mask in before) - sum(count_bits(mask) for mask in encode_board(move.board))
+
+    def move_key(self, move):
+        before = encode_board(self.states[-1].board)
+        return tuple(old ^ new for old, new in zip(before, encode_board(move.board)))
+
+    def successor(self, move):
+        return move
+
+def search_position(state):
+    '''The Position to search state on, for either engine'''
+    if isinstance(state, BitState):
+        return Position(state.rm, state.rk, state.bm, state.bk)
+    return GridPosition(state)
+
+#====================================================================================
+
+# Bound types of transposition table values
+exact = 0
+lower_bound = 1
+upper_bound = 2
+
+class TranspositionTable:
+    # Search results keyed by the Zobrist hash of the board and player to move. The table has a
+    # fixed number of slots and a position lives in the slot picked by its hash, as
+    # (hash, depth, value, bound, best move, search). depth is how deep below the position it
+    # was searched, bound says whether value is exact or only a lower or upper bound on it (the
+    # search was cut off by beta or alpha), and best move is the board hash of the successor
+    # that gave value. search numbers the alpha_beta_search calls. On a collision the entry of
+    # the current search that was searched deeper keeps its slot; entries of earlier searches
+    # are always replaced.
+    def __init__(self, size):
+
+        self.size = size
+        self.slots = [None] * size
+        self.search = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self):
+        self.search += 1
+
+    def lookup(self, key):
+        '''The entry of the position with hash key, or None'''
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, depth, value, bound, best_move):
+        slot = key % self.size
+        old = self.slots[slot]
+        if old is None or old[5] != self.search or depth >= old[1]:
+            self.slots[slot] = (key, depth, value, bound, best_move, self.search)
+
+def table_cutoff(entry, depth, alpha, beta):
+    '''Whether entry answers the search of its position depth moves deep with window (alpha, beta)'''
+    if entry is None or entry[1] < depth:
+        return False
+    value, bound = entry[2], entry[3]
+    return bound == exact or (bound == lower_bound and value >= beta) or (bound == upper_bound and value <= alpha)
+
+def best_move_first(moves, entry, position):
+    # Move the move the table found best the last time to the front, it most likely still is.
+    # Returns whether it was found
+    if entry is not None and entry[4] is not None:
+        for index, move in enumerate(moves):
+            if position.move_hash(move) == entry[4]:
+                moves.insert(0, moves.pop(index))
+                return True
+    return False
+
+# Move orderings, see MoveOrdering
+orderings = ['full', 'table', 'none']
+
+class MoveOrdering:
+    # Orders the moves of each node so the one most likely to cause a cutoff is searched first.
+    # With 'full', the best move of the transposition table comes first, then captures by the
+    # number of pieces they take, then the killer moves of the ply (the last two moves that caused
+    # a cutoff at the same depth in another node) and the rest by their history score (the sum
+    # of the squared depths left of the cutoffs they caused anywhere). Captures are forced, so
+    # a node has either only captures or none, and killers and history only hold moves that
+    # capture nothing. 'table' only puts the best move of the table first and 'none' keeps the
+    # order of the moves generated, for comparing them. Also counts the nodes searched, the
+    # cutoffs and how many of them the first move searched caused.
+    def __init__(self, mode='full'):
+
+        self.mode = mode
+        self.killers = {}
+        self.history = {}
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        # Killers are by depth from the root, which is a different position every move. History
+        # is kept, but halved so the cutoffs of this search count the most
+        self.killers = {}
+        for key in self.history:
+            self.history[key] //= 2
+
+    def order(self, moves, entry, position, depth):
+        '''Sort moves, the moves of position depth moves below the root, in the order to search them'''
+        if self.mode == 'none':
+            return
+        start = 1 if best_move_first(moves, entry, position) else 0
+        if self.mode == 'table' or len(moves) - start < 2:
+            return
+        killers = self.killers.get(depth, [])
+        history = self.history
+
+        def score(move):
+            captures = position.captures(move)
+            if captures:
+                return (2, captures)
+            key = position.move_key(move)
+            if key in killers:
+                return (1, -killers.index(key))
+            return (0, history.get(key, 0))
+
+        # The sort is stable, so moves that score the same keep the order they were generated in
+        moves[start:] = sorted(moves[start:], key=score, reverse=True)
+
+    def cutoff(self, move, index, position, depth, remaining):
+        '''Record that move, the index-th move searched, cut off the search depth moves below the root with
+        remaining moves left to search'''
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if self.mode != 'full' or position.captures(move):
+            return
+        key = position.move_key(move)
+        killers = self.killers.setdefault(depth, [])
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+        self.history[key] = self.history.get(key, 0) + remaining * remaining
+
+class SearchTimeout(Exception):
+    # Raised inside max_value/min_value once the deadline of the search has passed
+    pass
+
+def alpha_beta_search_max(state, turn, table, ordering, budget=None):
+    return iterative_deepening(state, turn, table, ordering, max_value, budget)
+
+def alpha_beta_search_min(state, turn, table, ordering, budget=None):
+    return iterative_deepening(state, turn, table, ordering, min_value, budget)
+
+def iterative_deepening(state, turn, table, ordering, search, budget):
+    '''Search state with search (max_value or min_value) and return the successor it picks. Without a budget
+    this is one search max_depth moves deep. With one, the search is repeated 1, 2, ... moves deep until
+    max_depth or until budget seconds have passed, and the successor of the deepest search that finished is
+    returned. Each search tries the best moves of the previous one first, from the transposition table'''
+    position = search_position(state)
+    if budget is None:
+        limits = [max_depth]
+        deadline = None
+    else:
+        limits = range(1, max_depth + 1)
+        deadline = time.perf_counter() + budget
+    best_move = None
+    ordering.new_search()
+    for limit in limits:
+        table.new_search()
+        try:
+            # The first search always finishes, so there is a move to play
+            v, move = search(position, -100000, 100000, 0, turn, table, ordering, limit, \
+                deadline if limit > 1 else None)
+        except SearchTimeout:
+            # The unfinished search left its moves made on position
+            position = search_position(state)
+            break
+        best_move = move
+        if v == 100000 or v == -100000:
+            # The game is decided within limit moves, searching deeper will not change that
+            break
     # Return the action with the value v
-    return best_move
+    return None if best_move is None else position.successor(best_move)
 
-def max_value(state, alpha, beta, depth, turn, cache):
-    if depth == 10 or state.is_goal_min == True or state.is_goal_max == True:
+def max_value(position, alpha, beta, depth, turn, table, ordering, limit, deadline=None):
+    # position is searched by making each move on it and unmaking it afterwards, so it is the
+    # same when this returns. best_move is one of position.moves(turn). The search stops limit
+    # moves deep, and raises SearchTimeout once deadline (a time.perf_counter time) has passed.
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    ordering.nodes += 1
+    key = position.zobrist ^ side_keys[turn]
+    entry = table.lookup(key)
+    # The root has to return a move, so it is always searched
+    if depth > 0 and table_cutoff(entry, limit - depth, alpha, beta):
+        return entry[2], None
+    if depth == limit or position.is_goal_min() or position.is_goal_max():
         # At depth limit or terminal state
-        # State caching
-        if str(state) not in cache.keys():
-            state.eval_fnc(turn)
-            # print(state.eval)
-            cache[str(state)] = state.eval
-        return cache[str(state)], state
+        value = position.evaluate(turn)
+        table.store(key, 0, value, exact, None)
+        return value, None
     v = -100000
     best_move = None
-    actions = simulate_successors(state, turn, dec='max')
+    alpha_start = alpha
+    moves = position.moves(turn)
     # Node Ordering
-    actions.sort(key=lambda x: x.eval, reverse=True)
-    for action in actions:
-        curr_v = min_value(action, alpha, beta, depth+1, get_next_turn(turn), cache)[0]
+    ordering.order(moves, entry, position, depth)
+    for index, move in enumerate(moves):
+        position.make(move)
+        curr_v = min_value(position, alpha, beta, depth+1, get_next_turn(turn), table, ordering, limit, \
+            deadline)[0]
+        position.unmake(move)
         if curr_v >= v:
             v = curr_v
-            best_move = action
+            best_move = move
         if v >= beta:
-            return v, best_move
+            ordering.cutoff(move, index, position, depth, limit - depth)
+            break
         alpha = max(alpha, v)
+    if v >= beta and moves:
+        bound = lower_bound
+    elif v <= alpha_start and moves:
+        bound = upper_bound
+    else:
+        bound = exact
+    table.store(key, limit - depth, v, bound, None if best_move is None else position.move_hash(best_move))
     return v, best_move
 
-def min_value(state, alpha, beta, depth, turn, cache):
-    if depth == 10 or state.is_goal_min == True or state.is_goal_max == True:
+def min_value(position, alpha, beta, depth, turn, table, ordering, limit, deadline=None):
+    # See max_value
+    if deadline is not None and time.perf_counter() > deadline:
+        raise SearchTimeout()
+    ordering.nodes += 1
+    key = position.zobrist ^ side_keys[turn]
+    entry = table.lookup(key)
+    # The root has to return a move, so it is always searched
+    if depth > 0 and table_cutoff(entry, limit - depth, alpha, beta):
+        return entry[2], None
+    if depth == limit or position.is_goal_min() or position.is_goal_max():
         # At depth limit or terminal state
-        # State caching
-        if str(state) not in cache.keys():
-            state.eval_fnc(turn)
-            cache[str(state)] = state.eval
-        return cache[str(state)], state
+        value = position.evaluate(turn)
+        table.store(key, 0, value, exact, None)
+        return value, None
     v = 100000
     best_move = None
-    actions = simulate_successors(state, turn, dec='min')
+    beta_start = beta
+    moves = position.moves(turn)
     # Node Ordering
-    actions.sort(key=lambda x: x.eval)
-    for action in actions:
-        curr_v = max_value(action, alpha, beta, depth+1, get_next_turn(turn), cache)[0]
+    ordering.order(moves, entry, position, depth)
+    for index, move in enumerate(moves):
+        position.make(move)
+        curr_v = max_value(position, alpha, beta, depth+1, get_next_turn(turn), table, ordering, limit, \
+            deadline)[0]
+        position.unmake(move)
         if curr_v <= v:
             v = curr_v
-            best_move = action
+            best_move = move
         if v <= alpha:
-            return v, best_move
+            ordering.cutoff(move, index, position, depth, limit - depth)
+            break
         beta = min(beta, v)
+    if v <= alpha and moves:
+        bound = upper_bound
+    elif v >= beta_start and moves:
+        bound = lower_bound
+    else:
+        bound = exact
+    table.store(key, limit - depth, v, bound, None if best_move is None else position.move_hash(best_move))
     return v, best_move
 
-def game_time(state, cache):
+def game_time(state, table, ordering, budget=None):
     # red always goes first
+    # budget is the time each move may take, see iterative_deepening
     turn = 'r'
     while state.eval != 100000 and state.eval != -100000:
         if turn == 'r':
             # alpha beta pruning for red
-            red_move = alpha_beta_search_max(state, 'r', cache)
+            red_move = alpha_beta_search_max(state, 'r', table, ordering, budget)
             # print(red_move.board)
             red_move.eval_fnc(turn)
             red_move.parent = state
             state = red_move
         elif turn == 'b':
             # alpha beta pruning for black
-            black_move = alpha_beta_search_min(red_move, 'b', cache)
+            black_move = alpha_beta_search_min(red_move, 'b', table, ordering, budget)
             # print(black_move.board)
             black_move.eval_fnc(turn)
             black_move.parent = state
@@ -929,15 +1533,83 @@ if __name__ == '__main__':
         required=True,
         help="The output file that contains the solution."
     )
+    parser.add_argument(
+        "--board",
+        type=str,
+        default='bitboard',
+        choices=['bitboard', 'grid'],
+        help="Board representation used during the search."
+    )
+    parser.add_argument(
+        "--tt-size",
+        type=int,
+        default=1 << 18,
+        help="Number of positions the transposition table holds."
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=max_depth,
+        help="Number of moves the search looks ahead."
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Seconds each move may take. The search deepens one move at a time up to --depth and plays the "
+            "move of the deepest search that finished in time."
+    )
+    parser.add_argument(
+        "--ordering",
+        type=str,
+        default='full',
+        choices=orderings,
+        help="How the moves of each node are ordered: the best move of the transposition table, captures, "
+            "killer moves and history (full), only the best move of the table (table) or as generated (none)."
+    )
+    parser.add_argument(
+        "--stats",
+        type=str,
+        nargs='?',
+        const='-',
+        help="Write the nodes searched and the cutoffs of the game as JSON to this file (stdout without one)."
+    )
     args = parser.parse_args()
+    max_depth = args.depth
 
     initial_board = read_from_file(args.inputfile)
     init_state = State(initial_board)
+    if args.board == 'bitboard':
+        init_state = BitState(*encode_board(initial_board))
     turn = 'r'
     ctr = 0
 
     # Run game
-    cache = dict()
-    final_state = game_time(init_state, cache)
+    table = TranspositionTable(args.tt_size)
+    ordering = MoveOrdering(args.ordering)
+    start = time.perf_counter()
+    final_state = game_time(init_state, table, ordering, args.time_budget)
+    seconds = time.perf_counter() - start
     output_file(args.outputfile, final_state)
 
+    if args.stats is not None:
+        stats = {
+            'input': args.inputfile,
+            'board': args.board,
+            'ordering': args.ordering,
+            'depth': max_depth,
+            'moves': len(final_state.get_path()) - 1,
+            'seconds': round(seconds, 6),
+            'nodes': ordering.nodes,
+            'cutoffs': ordering.cutoffs,
+            'first_move_cutoffs': ordering.first_move_cutoffs,
+            'first_move_cutoff_rate': round(ordering.first_move_cutoffs / max(ordering.cutoffs, 1), 4),
+            'table_probes': table.probes,
+            'table_hits': table.hits,
+        }
+        if args.stats == '-':
+            print(json.dumps(stats, indent=2))
+        else:
+            with open(args.stats, 'w') as stats_file:
+                json.dump(stats, stats_file, indent=2)
+                stats_file.write('\n')
+
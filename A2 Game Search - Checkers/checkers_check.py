@@ -0,0 +1,104 @@
+import argparse
+import random
+import sys
+
+import checkers
+
+# Checks the bitboard engine against the grid engine on random positions. For both players the
+# successors of every position must be the same boards in the same order, with the same jump
+# flags, and both evaluations must agree. Each move of a Position is also made and unmade: the
+# board and Zobrist hash after it must be the grid successor's, unmaking it must restore the
+# position, and its captures and move key must match those of GridPosition. Exits with status 1
+# on the first mismatch.
+
+dark_squares = [(row, col) for row in range(8) for col in range(8) if (row + col) % 2]
+
+def random_board(rng, max_pieces):
+    # Up to max_pieces pieces on random dark squares, men on their crowning row already kings
+    board = [['.'] * 8 for row in range(8)]
+    for row, col in rng.sample(dark_squares, rng.randint(1, max_pieces)):
+        piece = rng.choice('rrrbbbRB')
+        if piece == 'r' and row == 0:
+            piece = 'R'
+        elif piece == 'b' and row == 7:
+            piece = 'B'
+        board[row][col] = piece
+    return board
+
+def check_engines(board):
+    # Description of the first difference between the grid and bitboard engines, or None
+    grid = checkers.State(board)
+    bits = checkers.BitState(*checkers.encode_board(board))
+    if bits.board != board:
+        return 'decode_board(encode_board(board)) is not board'
+    for turn in 'rb':
+        grid_successors = checkers.simulate_successors(grid, turn, None)
+        bit_successors = checkers.simulate_successors(bits, turn, None)
+        if [state.board for state in grid_successors] != [state.board for state in bit_successors]:
+            return 'successors of {} differ'.format(turn)
+        if [(state.single_jump, state.multi_jump) for state in grid_successors] != \
+            [(state.single_jump, state.multi_jump) for state in bit_successors]:
+            return 'jump flags of the successors of {} differ'.format(turn)
+    grid.eval_fnc('r')
+    bits.eval_fnc('r')
+    if grid.eval != bits.eval:
+        return 'eval {} on the grid, {} on the bitboard'.format(grid.eval, bits.eval)
+    return None
+
+def check_moves(board):
+    # Description of the first move a Position makes or unmakes wrongly, or None
+    position = checkers.Position(*checkers.encode_board(board))
+    grid_position = checkers.GridPosition(checkers.State(board))
+    before = (position.rm, position.rk, position.bm, position.bk, position.zobrist)
+    for turn in 'rb':
+        grid_moves = grid_position.moves(turn)
+        moves = position.moves(turn)
+        if len(moves) != len(grid_moves):
+            return '{} moves for {}, {} on the grid'.format(len(moves), turn, len(grid_moves))
+        for move, grid_move in zip(moves, grid_moves):
+            if position.captures(move) != grid_position.captures(grid_move) or \
+                position.move_key(move) != grid_position.move_key(grid_move):
+                return 'captures or move key of a move of {} differ'.format(turn)
+            position.make(move)
+            if checkers.decode_board(position.rm, position.rk, position.bm, position.bk) != grid_move.board:
+                return 'a move of {} gives another board than on the grid'.format(turn)
+            if position.zobrist != checkers.board_hash(grid_move):
+                return 'hash after a move of {} is not the hash of its board'.format(turn)
+            position.unmake(move)
+            if (position.rm, position.rk, position.bm, position.bk, position.zobrist) != before:
+                return 'unmaking a move of {} does not restore the position'.format(turn)
+    return None
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--positions",
+        type=int,
+        default=20000,
+        help="Number of random positions to check."
+    )
+    parser.add_argument(
+        "--max-pieces",
+        type=int,
+        default=16,
+        help="Most pieces on a random position."
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=384,
+        help="Seed of the random positions, so a failure can be reproduced."
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for index in range(args.positions):
+        board = random_board(rng, args.max_pieces)
+        problem = check_engines(board) or check_moves(board)
+        if problem is not None:
+            print('position {}: {}'.format(index, problem))
+            for row in board:
+                print(''.join(row))
+            sys.exit(1)
+    print('{} positions checked'.format(args.positions))